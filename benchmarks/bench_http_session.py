@@ -0,0 +1,79 @@
+# Measures the latency of probing and downloading a dropped link, with a new
+# connection for every request against the shared keep-alive session.
+# The server is local, so only the TCP handshake is saved: with TLS and a
+# real network round trip the difference is much bigger.
+#
+# Usage: python benchmarks/bench_http_session.py [--links 200]
+
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lib.network import create_http_session
+
+PAYLOAD = os.urandom(64 * 1024)
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def send_image_headers(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_image_headers()
+
+    def do_GET(self):
+        self.send_image_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+def drop_link(http, url):
+    # the requests made for every dropped image link
+    http.head(url)
+    return http.get(url, timeout=30).content
+
+def run(http, base_url, links):
+    timings = []
+
+    for i in range(links):
+        start = time.perf_counter()
+        drop_link(http, f'{base_url}/image_{i}.png')
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        'median_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95)] * 1000, 3),
+        'total_s': round(sum(timings), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--links', type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    for variant, http in [('new_connections', requests), ('shared_session', create_http_session())]:
+        result = run(http, base_url, args.links)
+        result.update({'variant': variant, 'links': args.links})
+        print(json.dumps(result))
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
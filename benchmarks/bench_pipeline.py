@@ -0,0 +1,315 @@
+# Times every stage of the drop pipeline on synthetic corpora and writes
+# the results as JSON, so that releases can be compared with each other.
+#
+# Only the display-free core is needed: the stages that depend on GTK
+# (DroppedItem construction, SVG previews) are skipped when gi is missing.
+#
+# Usage: python benchmarks/bench_pipeline.py [--runs 5] [--output results.json]
+# Compare two result files with benchmarks/compare.py
+
+import os
+import re
+import sys
+import time
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# the caches are created under XDG_CACHE_HOME when the modules are imported,
+# the benchmark must never read or fill the caches of the user
+CACHE_DIR = tempfile.mkdtemp(prefix='collector-bench-cache-')
+os.environ['XDG_CACHE_HOME'] = CACHE_DIR
+
+import corpus
+from src.lib import files
+from src.lib.Item import Item
+from src.lib.TextCollection import TextCollection
+from src.lib.DownloadScheduler import DownloadScheduler
+
+try:
+    import gi
+    gi.require_version('Gtk', '4.0')
+    gi.require_version('Gdk', '4.0')
+    gi.require_version('Adw', '1')
+    gi.require_version('GdkPixbuf', '2.0')
+
+    from gi.repository import Gio
+    from src.lib.DroppedItem import DroppedItem
+except (ImportError, ValueError) as e:
+    DroppedItem = None
+    gi_error = str(e)
+
+def get_app_version():
+    with open(f'{ROOT_DIR}/meson.build') as f:
+        version = re.findall(r"version: '([^']+)'", f.read())
+
+    return version[0] if version else None
+
+def clear_preview_cache():
+    shutil.rmtree(Item.thumbnail_cache.CACHE_PATH, ignore_errors=True)
+    Item.thumbnail_cache.tot_size = None
+
+def clear_hash_cache():
+    with files._file_hash_cache_lock:
+        files._file_hash_cache.clear()
+
+def measure(name, fn, runs, items=1, setup=None, warmup=False):
+    """Runs fn runs times, setup is called before every run and is not timed.
+
+    With warmup, fn runs once more before the timed runs, so that the caches it relies on are filled.
+    """
+    timings = []
+
+    if warmup:
+        if setup:
+            setup()
+
+        fn()
+
+    for i in range(runs):
+        if setup:
+            setup()
+
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+
+    return {
+        'name': name,
+        'runs': runs,
+        'items': items,
+        'median_ms': round(median * 1000, 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        'min_ms': round(timings[0] * 1000, 3),
+        'per_item_ms': round(median * 1000 / items, 4),
+    }
+
+def skipped(name, reason):
+    return {'name': name, 'skipped': reason}
+
+def bench_item_construction(args, data_dir, small_files, snippets, links):
+    drops_dir = f'{data_dir}/drops'
+    os.makedirs(drops_dir, exist_ok=True)
+
+    def from_files():
+        for path in small_files:
+            item = Item(drops_dir)
+            item.set_file(path)
+            item.load_info()
+
+    def from_text():
+        for text in snippets:
+            Item(drops_dir).set_text(text)
+
+    def from_links():
+        for link in links:
+            Item(drops_dir).set_text(link)
+
+    results = [
+        measure('item_from_file', from_files, args.runs, len(small_files)),
+        measure('item_from_text', from_text, args.runs, len(snippets)),
+        measure('item_from_link', from_links, args.runs, len(links)),
+    ]
+
+    if DroppedItem:
+        gfiles = [Gio.File.new_for_path(p) for p in small_files]
+
+        def dropped_items():
+            for gfile in gfiles:
+                DroppedItem(gfile, drops_dir=drops_dir)
+
+        results.append(measure('dropped_item_from_file', dropped_items, args.runs, len(gfiles)))
+    else:
+        results.append(skipped('dropped_item_from_file', gi_error))
+
+    return results
+
+def bench_previews(args, data_dir, jpegs, svgs):
+    def get_previews(paths, item_class):
+        def run():
+            for path in paths:
+                item = item_class(data_dir)
+                item.set_file(path)
+                item.load_info()
+                item.get_preview()
+
+        return run
+
+    results = [
+        measure('preview_big_jpeg_cold', get_previews(jpegs, Item), args.runs, len(jpegs),
+            setup=clear_preview_cache),
+        measure('preview_big_jpeg_cached', get_previews(jpegs, Item), args.runs, len(jpegs), warmup=True),
+    ]
+
+    if DroppedItem:
+        gfiles = [Gio.File.new_for_path(p) for p in svgs]
+
+        def svg_previews():
+            for gfile in gfiles:
+                item = DroppedItem(gfile, drops_dir=data_dir)
+                item.load_info()
+                item.get_preview()
+
+        results.append(measure('preview_large_svg_cold', svg_previews, args.runs, len(svgs),
+            setup=clear_preview_cache))
+    else:
+        results.append(skipped('preview_large_svg_cold', gi_error))
+
+    return results
+
+def bench_file_hash(args, small_files, jpegs):
+    def hash_files(paths):
+        def run():
+            for path in paths:
+                files.get_file_hash(path, alg='blake2b')
+
+        return run
+
+    return [
+        measure('file_hash_small_files', hash_files(small_files), args.runs, len(small_files),
+            setup=clear_hash_cache),
+        measure('file_hash_big_jpeg', hash_files(jpegs), args.runs, len(jpegs),
+            setup=clear_hash_cache),
+        measure('file_hash_memoized', hash_files(small_files), args.runs, len(small_files), warmup=True),
+    ]
+
+def bench_text_collection(args, data_dir, snippets):
+    collections: list[TextCollection] = []
+
+    def new_collection():
+        for c in collections:
+            c.clear()
+
+        collections[:] = [TextCollection(data_dir)]
+
+    def append_text():
+        for text in snippets:
+            collections[0].append_text(text)
+
+    def fill_collection():
+        new_collection()
+        append_text()
+        collections[0].flush()
+
+    results = [
+        measure('text_collection_append', append_text, args.runs, len(snippets), setup=new_collection),
+        measure('text_collection_get_copied_text', lambda: collections[0].get_copied_text(),
+            args.runs, len(snippets), setup=fill_collection),
+        measure('text_collection_search', lambda: collections[0].search('ab'),
+            args.runs, len(snippets)),
+    ]
+
+    new_collection()
+    collections[0].close()
+    return results
+
+def bench_links(args, data_dir, links):
+    drops_dir = f'{data_dir}/downloads'
+    os.makedirs(drops_dir, exist_ok=True)
+    max_size = 50 * (1024 * 1024)
+
+    def clear_downloads():
+        shutil.rmtree(drops_dir)
+        os.makedirs(drops_dir)
+
+    def download(link):
+        item = Item(drops_dir)
+        item.set_text(link)
+
+        if not item.download_link(max_size):
+            raise Exception(f'Could not download {link}')
+
+    def sequential():
+        for link in links:
+            download(link)
+
+    def scheduled():
+        # same limits as the app, all the links come from the same host
+        scheduler = DownloadScheduler()
+        done = threading.Semaphore(0)
+
+        def download_and_release(link):
+            try:
+                download(link)
+            finally:
+                done.release()
+
+        for link in links:
+            scheduler.submit('127.0.0.1', lambda l=link: download_and_release(l))
+
+        for link in links:
+            done.acquire()
+
+        scheduler.executor.shutdown()
+
+    return [
+        measure('complete_load_links_sequential', sequential, args.runs, len(links),
+            setup=clear_downloads),
+        measure('complete_load_links_scheduled', scheduled, args.runs, len(links),
+            setup=clear_downloads),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--files', type=int, default=2000, help='number of small files')
+    parser.add_argument('--jpegs', type=int, default=3, help='number of 24 MP JPEG images')
+    parser.add_argument('--svgs', type=int, default=3, help='number of SVG documents with 20k shapes')
+    parser.add_argument('--texts', type=int, default=5000, help='number of text snippets')
+    parser.add_argument('--links', type=int, default=100, help='number of image links')
+    parser.add_argument('--latency-ms', type=int, default=20, help='simulated latency of the HTTP server')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='collector-bench-') as data_dir:
+        small_files = corpus.create_small_files(f'{data_dir}/small', args.files)
+        jpegs = corpus.create_big_jpegs(f'{data_dir}/jpeg', args.jpegs)
+        svgs = corpus.create_large_svgs(f'{data_dir}/svg', args.svgs)
+        snippets = corpus.create_text_snippets(args.texts)
+
+        server, base_url = corpus.serve_folder(f'{data_dir}/served', args.latency_ms)
+        links = corpus.create_link_list(f'{data_dir}/served', base_url, args.links)
+
+        for bench in [
+            lambda: bench_item_construction(args, data_dir, small_files, snippets, links),
+            lambda: bench_previews(args, data_dir, jpegs, svgs),
+            lambda: bench_file_hash(args, small_files, jpegs),
+            lambda: bench_text_collection(args, data_dir, snippets),
+            lambda: bench_links(args, data_dir, links),
+        ]:
+            for result in bench():
+                results.append(result)
+                print(json.dumps(result))
+
+        server.shutdown()
+
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    if args.output:
+        report = {
+            'version': get_app_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': int(time.time()),
+            'params': vars(args),
+            'results': results,
+        }
+
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
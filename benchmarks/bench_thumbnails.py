@@ -0,0 +1,98 @@
+# Compares the preview decoding of big camera images, before and after
+# load_image_thumbnail() in src/lib/thumbnails.py: Image.thumbnail() already
+# decodes JPEG at reduced resolution, so the two should be on par
+#
+# Usage: python benchmarks/bench_thumbnails.py [--runs 5]
+
+import os
+import sys
+import time
+import json
+import resource
+import argparse
+import tempfile
+import multiprocessing
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lib.thumbnails import load_image_thumbnail
+
+IMAGE_SIZE = (6000, 4000)  # 24 MP
+
+def legacy_thumbnail(image_path):
+    # the preview code before the fast path
+    image = Image.open(image_path)
+    image.thumbnail((200, 200))
+    return image
+
+VARIANTS = {
+    'legacy': legacy_thumbnail,
+    'current': load_image_thumbnail,
+}
+
+def create_image(path, fmt):
+    noise = Image.effect_noise(IMAGE_SIZE, 40)
+    gradient = Image.linear_gradient('L').resize(IMAGE_SIZE)
+    image = Image.merge('RGB', [noise, gradient, gradient.transpose(Image.Transpose.ROTATE_180)])
+    image.save(path, format=fmt, quality=90)
+
+def get_peak_rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def reset_peak_rss():
+    # ru_maxrss survives exec(), so the peak of the parent process is cleared first
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def run_variant(variant, image_path, runs, queue):
+    reset_peak_rss()
+    rss_before = get_peak_rss_kb()
+    timings = []
+
+    for i in range(runs):
+        start = time.perf_counter()
+        VARIANTS[variant](image_path)
+        timings.append(time.perf_counter() - start)
+
+    rss_after = get_peak_rss_kb()
+    queue.put({
+        'time_ms': round(sorted(timings)[len(timings) // 2] * 1000, 2),
+        'peak_rss_mb': round((rss_after - rss_before) / 1024, 1),
+    })
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in ['JPEG', 'WEBP', 'PNG']:
+            image_path = f'{tmp_dir}/image.{fmt.lower()}'
+            create_image(image_path, fmt)
+
+            for variant in VARIANTS.keys():
+                # every variant runs in a new process, so that the peak memory is not shared
+                queue = ctx.Queue()
+                p = ctx.Process(target=run_variant, args=(variant, image_path, args.runs, queue))
+                p.start()
+                result = queue.get()
+                p.join()
+
+                result.update({'format': fmt, 'variant': variant})
+                results.append(result)
+                print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
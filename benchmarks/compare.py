@@ -0,0 +1,46 @@
+# Compares two result files of bench_pipeline.py, e.g. of two releases.
+# Exits with status 1 if a stage got slower than the threshold.
+#
+# Usage: python benchmarks/compare.py baseline.json results.json [--threshold 10]
+
+import sys
+import json
+import argparse
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+
+    return report, {r['name']: r for r in report['results'] if not 'skipped' in r}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('baseline')
+    parser.add_argument('results')
+    parser.add_argument('--threshold', type=float, default=10, help='max slowdown, in percent')
+    args = parser.parse_args()
+
+    baseline_report, baseline = load_results(args.baseline)
+    report, results = load_results(args.results)
+
+    print(f'{baseline_report["version"]} -> {report["version"]}')
+
+    regressions = 0
+    for name, result in results.items():
+        if not name in baseline:
+            print(f'{name:40} {result["median_ms"]:>12} ms   (new)')
+            continue
+
+        before = baseline[name]['per_item_ms']
+        after = result['per_item_ms']
+        change = ((after - before) / before * 100) if before else 0
+
+        is_regression = change > args.threshold
+        regressions += is_regression
+
+        print(f'{name:40} {before:>12} -> {after:<12} ms/item {change:+7.1f}%' + (' REGRESSION' if is_regression else ''))
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Synthetic inputs for the benchmarks: they are generated on every run,
+# so no binary data has to be stored in the repository.
+
+import os
+import time
+import random
+import string
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from PIL import Image
+
+def create_small_files(dir_path, count, size=4 * 1024):
+    os.makedirs(dir_path, exist_ok=True)
+    paths = []
+
+    for i in range(count):
+        path = f'{dir_path}/file_{i}.txt'
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+
+        paths.append(path)
+
+    return paths
+
+def create_jpeg(path, size=(6000, 4000)):
+    noise = Image.effect_noise(size, 40)
+    gradient = Image.linear_gradient('L').resize(size)
+    image = Image.merge('RGB', [noise, gradient, gradient.transpose(Image.Transpose.ROTATE_180)])
+    image.save(path, format='JPEG', quality=90)
+
+    return path
+
+def create_big_jpegs(dir_path, count, size=(6000, 4000)):
+    os.makedirs(dir_path, exist_ok=True)
+    return [create_jpeg(f'{dir_path}/photo_{i}.jpg', size) for i in range(count)]
+
+def create_svg(path, shapes=20000):
+    rnd = random.Random(path)
+
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<svg xmlns="http://www.w3.org/2000/svg" width="2000" height="2000" viewBox="0 0 2000 2000">\n')
+
+        for i in range(shapes):
+            x, y, r = rnd.randint(0, 2000), rnd.randint(0, 2000), rnd.randint(2, 60)
+            color = '#%06x' % rnd.randint(0, 0xffffff)
+            f.write(f'<circle cx="{x}" cy="{y}" r="{r}" fill="{color}" fill-opacity="0.6"/>\n')
+
+        f.write('</svg>\n')
+
+    return path
+
+def create_large_svgs(dir_path, count, shapes=20000):
+    os.makedirs(dir_path, exist_ok=True)
+    return [create_svg(f'{dir_path}/drawing_{i}.svg', shapes) for i in range(count)]
+
+def create_text_snippets(count, length=2000):
+    rnd = random.Random(count)
+    alphabet = string.ascii_letters + string.digits + '     ,."\n'
+
+    return [''.join(rnd.choices(alphabet, k=length)) for i in range(count)]
+
+class LinkHandler(SimpleHTTPRequestHandler):
+    """Serves the corpus folder, every request waits for the simulated network latency"""
+
+    latency = 0.0
+
+    def end_headers(self):
+        # the responses are never cached, so that every run hits the server
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def send_head(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        return super().send_head()
+
+    def log_message(self, *args):
+        pass
+
+def serve_folder(dir_path, latency_ms=0):
+    """Starts an HTTP server in a background thread, returns the server and its base URL"""
+    handler = type('Handler', (LinkHandler,), {'latency': latency_ms / 1000})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=dir_path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def create_link_list(dir_path, base_url, count, size=(1200, 800)):
+    """Saves count images in the served folder and returns their URLs"""
+    os.makedirs(dir_path, exist_ok=True)
+    links = []
+
+    for i in range(count):
+        image = Image.effect_noise(size, 40).convert('RGB')
+        image.save(f'{dir_path}/image_{i}.jpg', format='JPEG', quality=85)
+        links.append(f'{base_url}/image_{i}.jpg')
+
+    return links
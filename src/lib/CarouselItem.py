@@ -9,4 +9,7 @@ class CarouselItem():
     def __init__(self, item: DroppedItem, image: Gtk.Image, index: int):
         self.image = image
         self.dropped_item = item
-        self.index = index
\ No newline at end of file
+        self.index = index
+
+        # the size of the item that is currently included in the window total
+        self.counted_size = 0
@@ -1,90 +1,146 @@
-import csv
-import os
 from typing import Optional
-from gi.repository import Gio, Adw, Gtk, Gdk
+from gi.repository import Gio, Adw, Gtk, Gdk, GLib
 
-from .DroppedItem import DroppedItem
-from .utils import get_safe_path
+from .CsvRowsModel import CsvRowsModel
+from .TextCollection import TextCollection
+
+class CsvCollector(TextCollection):
+    # collected rows are written to disk after this delay, unless the buffer fills up first
+    FLUSH_INTERVAL_MS = 1000
 
-class CsvCollector():
     def __init__(self, drop_dir) -> None:
-        self.DROP_DIR = drop_dir
-        self.FILENAME = get_safe_path(f'{drop_dir}/collected_strings_', 'csv')
-        self.text_pieces = 0
+        super().__init__(drop_dir)
+
+        self.flush_source: Optional[int] = None
+        self.expanded_rows: set[int] = set()
+
+    def schedule_flush(self):
+        if not self.flush_source:
+            self.flush_source = GLib.timeout_add(self.FLUSH_INTERVAL_MS, self.on_flush_timeout)
+
+    def on_flush_timeout(self):
+        self.flush_source = None
+        self.flush()
 
-        with open(self.FILENAME, 'w+') as f:
-            f.write('')
+        return GLib.SOURCE_REMOVE
 
-    def append_text(self, text: str):
-        self.text_pieces += 1
-        with open(self.FILENAME, 'a') as f:
-            writer = csv.writer(f)
-            writer.writerow([text])
+    def flush(self):
+        if self.flush_source:
+            GLib.source_remove(self.flush_source)
+            self.flush_source = None
 
-            f.close()
+        super().flush()
 
     def get_gfile(self):
         return Gio.File.new_for_path(self.FILENAME)
 
-    def clear(self):
-        self.text_pieces = 0
-        if os.path.exists(self.FILENAME):
-            os.remove(self.FILENAME)
-
     def on_copy_btn_clicked(self, w: Gtk.Button, data):
         cp = Gdk.Display.get_default().get_clipboard()
         content_prov = Gdk.ContentProvider.new_for_value(data)
         cp.set_content(content_prov)
 
-    def get_copied_text(self):
-        lines = []
-        with open(self.FILENAME) as f:
-            csv_reader = csv.reader(f)
-            [lines.append(row[0]) for row in csv_reader]
+    def get_preview_text(self, text: str) -> str:
+        preview_text = text[:25]
+        preview_text = preview_text.replace('\n', '')
+
+        if len(text) > 26:
+            preview_text = preview_text + '...'
 
-        return lines
+        return preview_text
 
     def create_preview_modal(self) -> Adw.MessageDialog:
-        lines = self.get_copied_text()
+        self.expanded_rows = set()
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect('setup', self.on_preview_row_setup)
+        factory.connect('bind', self.on_preview_row_bind)
+        factory.connect('unbind', self.on_preview_row_unbind)
+
+        model = CsvRowsModel(self.get_row_count(), self.get_row)
+        listview = Gtk.ListView(
+            model=Gtk.NoSelection(model=model),
+            factory=factory,
+            css_classes=['card']
+        )
+
+        scrolled_window = Gtk.ScrolledWindow(
+            child=listview,
+            width_request=300,
+            propagate_natural_height=True,
+            max_content_height=400,
+            hscrollbar_policy=Gtk.PolicyType.NEVER
+        )
+
+        search_entry = Gtk.SearchEntry(placeholder_text=_('Search'))
+        search_entry.connect('search-changed', 
+            lambda w: model.set_search(lambda after_row, limit, q=w.get_text(): self.search(q, after_row, limit)))
+
+        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        content_box.append(search_entry)
+        content_box.append(scrolled_window)
+
+        dialog = Adw.MessageDialog(
+            extra_child=content_box
+        )
 
-        listbox = Gtk.ListBox(css_classes=['boxed-list'], width_request=300)
+        dialog.add_response('close', _('Close'))
+        dialog.set_close_response('close')
 
-        for l in lines:
-            preview_text = l[:25]
-            preview_text = preview_text.replace('\n', '')
-            buffer = Gtk.TextBuffer(text=l)
-            textview = Gtk.TextView(buffer=buffer, editable=False, 
-                                    css_classes=['clipboard-dialog-textview'])
+        return dialog
 
-            if len(l) > 26:
-                preview_text = preview_text + '...'
+    def on_preview_row_setup(self, factory, list_item: Gtk.ListItem):
+        expander = Gtk.Expander(hexpand=True, valign=Gtk.Align.CENTER)
+        expander.row_index = None
+        expander.connect('notify::expanded', self.on_preview_row_expanded)
 
-            copy_btn = Gtk.Button(
-                icon_name='copy-symbolic',
-                css_classes=['flat'],
-                valign=Gtk.Align.CENTER
-            )
+        copy_btn = Gtk.Button(
+            icon_name='copy-symbolic',
+            css_classes=['flat'],
+            valign=Gtk.Align.START
+        )
 
-            copy_btn.connect('clicked', self.on_copy_btn_clicked, l)
+        copy_btn.connect('clicked', lambda w: self.on_copy_btn_clicked(w, 
+            self.get_row(list_item.get_item().index)))
 
-            actionrow = Adw.ExpanderRow(
-                title=preview_text,
-            )
+        row_box = Gtk.Box(spacing=10, margin_top=6, margin_bottom=6, margin_start=12, margin_end=6)
+        row_box.append(expander)
+        row_box.append(copy_btn)
 
-            actionrow.add_row(
-                textview
-            )
+        list_item.set_child(row_box)
 
-            actionrow.add_suffix(copy_btn)
+    def on_preview_row_bind(self, factory, list_item: Gtk.ListItem):
+        index = list_item.get_item().index
+        expander = list_item.get_child().get_first_child()
 
-            listbox.append(actionrow)
+        expander.row_index = index
+        expander.set_label(self.get_preview_text(self.get_row(index)))
+        expander.set_expanded(index in self.expanded_rows)
 
+    def on_preview_row_unbind(self, factory, list_item: Gtk.ListItem):
+        expander = list_item.get_child().get_first_child()
 
-        dialog = Adw.MessageDialog(
-            extra_child=listbox
-        )
+        # recycled widgets must not change the expanded state of the rows
+        expander.row_index = None
+        expander.set_expanded(False)
 
-        dialog.add_response('close', _('Close'))
-        dialog.set_close_response('close')
+    def on_preview_row_expanded(self, expander: Gtk.Expander, pspec):
+        index = expander.row_index
+
+        # text views only exist for the expanded rows that are visible
+        if index is None or not expander.get_expanded():
+            expander.set_child(None)
+
+            if index is not None:
+                self.expanded_rows.discard(index)
+
+            return
+
+        self.expanded_rows.add(index)
+        textview = Gtk.TextView(
+            buffer=Gtk.TextBuffer(text=self.get_row(index)),
+            editable=False,
+            wrap_mode=Gtk.WrapMode.WORD_CHAR,
+            css_classes=['clipboard-dialog-textview']
+        )
 
-        return dialog
\ No newline at end of file
+        expander.set_child(textview)
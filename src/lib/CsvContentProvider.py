@@ -0,0 +1,81 @@
+import mmap
+import logging
+from array import array
+from typing import Optional
+
+from gi.repository import Gdk, Gio, GLib
+
+from .CsvCollector import CsvCollector
+from .TextCollection import parse_csv_rows
+
+class CsvContentProvider(Gdk.ContentProvider):
+    """Clipboard content for the collected strings, written only when another app pastes it"""
+
+    MIME_TYPES = ['text/plain;charset=utf-8', 'text/plain']
+    ROWS_PER_CHUNK = 1000
+
+    def __init__(self, csvcollector: CsvCollector):
+        super().__init__()
+
+        # the content is the one at the moment of the copy: the file can be 
+        # appended to or removed later, but this mapping and these offsets stay valid
+        csvcollector.flush()
+        self.row_offsets = array('Q', csvcollector.row_offsets)
+        self.data: Optional[mmap.mmap] = None
+
+        if csvcollector.size:
+            with open(csvcollector.FILENAME, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def do_ref_formats(self):
+        builder = Gdk.ContentFormatsBuilder.new()
+        for mime_type in self.MIME_TYPES:
+            builder.add_mime_type(mime_type)
+
+        return builder.to_formats()
+
+    def do_write_mime_type_async(self, mime_type, stream, io_priority, cancellable, callback, user_data):
+        task = Gio.Task.new(self, cancellable, callback, user_data)
+
+        if mime_type not in self.MIME_TYPES:
+            task.return_error(GLib.Error(f'Cannot provide data for {mime_type}', 
+                Gio.io_error_quark(), Gio.IOErrorEnum.NOT_SUPPORTED))
+            return
+
+        logging.debug(f'Writing {len(self.row_offsets)} collected strings to the clipboard')
+        self.write_chunk(task, stream, io_priority, 0)
+
+    def do_write_mime_type_finish(self, result):
+        return result.propagate_boolean()
+
+    def get_rows_data(self, start: int, end: int) -> bytes:
+        row_count = len(self.row_offsets)
+        end_offset = self.row_offsets[end] if end < row_count else len(self.data)
+
+        rows = parse_csv_rows(self.data[self.row_offsets[start]:end_offset])
+        data = '\n'.join(rows)
+
+        if end < row_count:
+            data += '\n'
+
+        return data.encode()
+
+    def write_chunk(self, task: Gio.Task, stream: Gio.OutputStream, io_priority: int, start: int):
+        if not self.data or start >= len(self.row_offsets):
+            task.return_boolean(True)
+            return
+
+        end = min(start + self.ROWS_PER_CHUNK, len(self.row_offsets))
+        stream.write_all_async(self.get_rows_data(start, end), io_priority, 
+            task.get_cancellable(), self.on_chunk_written, (task, io_priority, end))
+
+    def on_chunk_written(self, stream: Gio.OutputStream, result, data):
+        task, io_priority, end = data
+
+        try:
+            stream.write_all_finish(result)
+        except GLib.Error as e:
+            task.return_error(e)
+            return
+
+        self.write_chunk(task, stream, io_priority, end)
@@ -0,0 +1,75 @@
+from typing import Callable, Optional
+
+from gi.repository import Gio, GObject, GLib
+
+class CsvRow(GObject.Object):
+    def __init__(self, index: int):
+        super().__init__()
+        self.index = index
+
+class CsvRowsModel(GObject.Object, Gio.ListModel):
+    """List model of the collected strings: rows are only read when a widget needs them"""
+
+    # search results are loaded in pages, while the list is scrolled
+    SEARCH_PAGE_SIZE = 200
+
+    def __init__(self, n_items: int, get_row: Callable[[int], str]):
+        super().__init__()
+        self.n_items = n_items
+        self.get_row = get_row
+
+        # when set, only these rows are part of the model
+        self.row_indexes: Optional[list[int]] = None
+        self.search: Optional[Callable[[int, int], Optional[list[int]]]] = None
+        self.has_more_results = False
+        self.load_source: Optional[int] = None
+
+    def set_search(self, search: Callable[[int, int], Optional[list[int]]]):
+        """search(after_row, limit) returns a page of matching rows, or None to show every row"""
+        old_n_items = self.do_get_n_items()
+
+        if self.load_source:
+            GLib.source_remove(self.load_source)
+            self.load_source = None
+
+        self.search = search
+        self.row_indexes = search(-1, self.SEARCH_PAGE_SIZE)
+        self.has_more_results = self.row_indexes is not None and len(self.row_indexes) == self.SEARCH_PAGE_SIZE
+
+        self.items_changed(0, old_n_items, self.do_get_n_items())
+
+    def load_more_results(self):
+        self.load_source = None
+
+        page = self.search(self.row_indexes[-1], self.SEARCH_PAGE_SIZE) or []
+        self.has_more_results = len(page) == self.SEARCH_PAGE_SIZE
+
+        position = len(self.row_indexes)
+        self.row_indexes.extend(page)
+        self.items_changed(position, 0, len(page))
+
+        return GLib.SOURCE_REMOVE
+
+    def do_get_item_type(self):
+        return CsvRow.__gtype__
+
+    def do_get_n_items(self):
+        if self.row_indexes is not None:
+            return len(self.row_indexes)
+
+        return self.n_items
+
+    def do_get_item(self, position):
+        if position >= self.do_get_n_items():
+            return None
+
+        if self.row_indexes is not None:
+            # the model can't change while the list view is reading it, the next page is loaded later
+            if self.has_more_results and not self.load_source and \
+                    position >= len(self.row_indexes) - (self.SEARCH_PAGE_SIZE // 2):
+
+                self.load_source = GLib.idle_add(self.load_more_results)
+
+            return CsvRow(self.row_indexes[position])
+
+        return CsvRow(position)
@@ -0,0 +1,104 @@
+import time
+import logging
+from collections import deque
+from typing import Callable
+
+from gi.repository import Gio, GLib
+
+class DirectorySizeWalker():
+    """Computes the size of a directory tree asynchronously, reporting partial totals"""
+
+    ATTRIBUTES = 'standard::name,standard::type,standard::size'
+    FILES_PER_BATCH = 200
+
+    # limits the number of directories that are open at the same time
+    MAX_OPEN_DIRECTORIES = 8
+
+    # partial totals are reported at most once in this interval
+    REPORT_INTERVAL_S = 0.2
+
+    def __init__(self, gfile: Gio.File, on_progress: Callable[[int, bool], None]) -> None:
+        self.gfile = gfile
+        self.on_progress = on_progress
+        self.cancellable = Gio.Cancellable()
+
+        self.size = 0
+        self.queue: deque[Gio.File] = deque()
+        self.open_directories = 0
+        self.last_report = 0
+
+    def start(self):
+        logging.debug(f'Computing size of directory {self.gfile.get_path()}')
+        self.queue.append(self.gfile)
+        self.process_queue()
+
+    def cancel(self):
+        self.cancellable.cancel()
+
+    def process_queue(self):
+        while self.queue and self.open_directories < self.MAX_OPEN_DIRECTORIES:
+            directory = self.queue.popleft()
+            self.open_directories += 1
+
+            directory.enumerate_children_async(self.ATTRIBUTES, 
+                Gio.FileQueryInfoFlags.NOFOLLOW_SYMLINKS, GLib.PRIORITY_LOW,
+                self.cancellable, self.on_enumerate_children_ready, directory)
+
+    def on_enumerate_children_ready(self, source: Gio.File, result, directory: Gio.File):
+        try:
+            enumerator = source.enumerate_children_finish(result)
+        except GLib.Error as e:
+            if self.is_cancelled(e):
+                return
+
+            logging.debug(f'Cannot read directory {directory.get_path()}: {e}')
+            self.on_directory_done()
+            return
+
+        enumerator.next_files_async(self.FILES_PER_BATCH, GLib.PRIORITY_LOW, 
+            self.cancellable, self.on_next_files_ready, directory)
+
+    def on_next_files_ready(self, enumerator: Gio.FileEnumerator, result, directory: Gio.File):
+        try:
+            infos = enumerator.next_files_finish(result)
+        except GLib.Error as e:
+            if self.is_cancelled(e):
+                return
+
+            logging.debug(f'Cannot read directory {directory.get_path()}: {e}')
+            infos = []
+
+        if not infos:
+            enumerator.close_async(GLib.PRIORITY_LOW, None, None)
+            self.on_directory_done()
+            return
+
+        for info in infos:
+            if info.get_file_type() == Gio.FileType.DIRECTORY:
+                self.queue.append(directory.get_child(info.get_name()))
+            else:
+                self.size += info.get_size()
+
+        self.report(False)
+        self.process_queue()
+
+        enumerator.next_files_async(self.FILES_PER_BATCH, GLib.PRIORITY_LOW, 
+            self.cancellable, self.on_next_files_ready, directory)
+
+    def on_directory_done(self):
+        self.open_directories -= 1
+        self.process_queue()
+
+        if not self.open_directories and not self.queue:
+            logging.debug(f'Size of directory {self.gfile.get_path()}: {self.size}')
+            self.report(True)
+
+    def report(self, done: bool):
+        now = time.monotonic()
+
+        if done or (now - self.last_report) >= self.REPORT_INTERVAL_S:
+            self.last_report = now
+            self.on_progress(self.size, done)
+
+    def is_cancelled(self, e: GLib.Error) -> bool:
+        return e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED)
@@ -0,0 +1,73 @@
+import os
+import logging
+import threading
+from typing import Optional
+
+class DiskCache():
+    """Folder of cache entries with a size cap, the least recently used entries are evicted first"""
+
+    CACHE_PATH = ''
+    MAX_SIZE_MB = 256
+
+    # when the cache is full, the oldest entries are removed until it's back to this ratio
+    EVICTION_TARGET_RATIO = 0.8
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tot_size: Optional[int] = None
+
+    def touch(self, path: str) -> bool:
+        try:
+            # bump the modification time: it is used as the last access time by the eviction
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def add(self, *paths: str):
+        """Accounts for the files of a new entry, evicting the old entries if the cache is full"""
+        with self.lock:
+            if self.tot_size is None:
+                self.tot_size = self.compute_size()
+            else:
+                self.tot_size += sum([os.path.getsize(p) for p in paths])
+
+            if self.tot_size > self.MAX_SIZE_MB * (1024 * 1024):
+                self.evict()
+
+    def get_entries(self) -> list[os.DirEntry]:
+        # temporary files are still being written
+        return [e for e in os.scandir(self.CACHE_PATH) if e.is_file() and not e.name.endswith('.tmp')]
+
+    def get_entry_key(self, filename: str) -> str:
+        """Files with the same key belong to the same entry, and are evicted together"""
+        return filename
+
+    def compute_size(self) -> int:
+        return sum([e.stat().st_size for e in self.get_entries()])
+
+    def evict(self):
+        entries: dict[str, list[os.DirEntry]] = {}
+        for e in self.get_entries():
+            entries.setdefault(self.get_entry_key(e.name), []).append(e)
+
+        # an entry was last used when the most recent of its files was touched
+        groups = sorted(entries.values(), key=lambda g: max([e.stat().st_mtime for e in g]))
+
+        max_size = self.MAX_SIZE_MB * (1024 * 1024) * self.EVICTION_TARGET_RATIO
+        tot_size = sum([e.stat().st_size for g in groups for e in g])
+
+        logging.debug(f'Evicting entries from {self.CACHE_PATH}, cache size is {tot_size} bytes')
+        for group in groups:
+            if tot_size <= max_size:
+                break
+
+            for e in group:
+                try:
+                    size = e.stat().st_size
+                    os.remove(e.path)
+                    tot_size -= size
+                except FileNotFoundError:
+                    pass
+
+        self.tot_size = tot_size
@@ -0,0 +1,58 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+class DownloadScheduler():
+    """Runs downloads with a global concurrency limit and a limit for every host"""
+
+    MAX_DOWNLOADS = 8
+    MAX_DOWNLOADS_PER_HOST = 4
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.queue: deque[tuple[str, Callable]] = deque()
+        self.active_downloads = 0
+        self.active_downloads_per_host: dict[str, int] = {}
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.MAX_DOWNLOADS,
+            thread_name_prefix='collector-download'
+        )
+
+    def submit(self, host: str, fn: Callable):
+        with self.lock:
+            self.queue.append((host, fn))
+            self.dispatch()
+
+    def dispatch(self):
+        # must be called with the lock held
+        for entry in list(self.queue):
+            if self.active_downloads >= self.MAX_DOWNLOADS:
+                break
+
+            host, fn = entry
+            if self.active_downloads_per_host.get(host, 0) >= self.MAX_DOWNLOADS_PER_HOST:
+                continue
+
+            self.queue.remove(entry)
+            self.active_downloads += 1
+            self.active_downloads_per_host[host] = self.active_downloads_per_host.get(host, 0) + 1
+
+            self.executor.submit(self.run, host, fn)
+
+    def run(self, host: str, fn: Callable):
+        try:
+            fn()
+        except Exception as e:
+            logging.error(f'Download from {host} failed: {e}')
+        finally:
+            with self.lock:
+                self.active_downloads -= 1
+                self.active_downloads_per_host[host] -= 1
+
+                if not self.active_downloads_per_host[host]:
+                    del self.active_downloads_per_host[host]
+
+                self.dispatch()
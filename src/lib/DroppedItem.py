@@ -1,15 +1,17 @@
 import os
 import logging
-import base64
-from PIL import Image
 
-from gi.repository import Gtk, Adw, Gio, GLib, Gdk
+from gi.repository import Gtk, Adw, Gio, GLib, Gdk, GdkPixbuf
 
-from .constants import APP_ID, SUPPORTED_IMG_TYPES
+from .Item import Item, SVG_TYPES
 from .utils import get_giofile_content_type, \
-    pillow_crop_center, get_file_hash, \
-    link_is_image, download_file, get_safe_path, \
+    pillow_crop_center, get_safe_path, \
     get_random_string, get_gsettings
+from .ThumbnailPool import ThumbnailPool
+from .tracing import span, traced
+from .thumbnails import load_image_thumbnail, PREVIEW_SIZE
+from .SystemThumbnails import lookup_system_thumbnail, get_system_thumbnail_target, \
+    get_thumbnail_name, get_file_mtime, get_thumbnail_uri
     
 
 class DroppedItemNotSupportedException(Exception):
@@ -19,21 +21,18 @@ class DroppedItemNotSupportedException(Exception):
 
         logging.warn(msg)
 
-class DroppedItem():
-    MAX_PREVIEW_SIZE_MB = 50
+class DroppedItem(Item):
+    thumbnail_pool = ThumbnailPool()
 
+    @traced('DroppedItem.__init__')
     def __init__(self, item, drops_dir, dynamic_size=False, is_clipboard=False, ignore_urls=False) -> None:
-        self.DROPS_DIR = drops_dir
+        super().__init__(drops_dir)
 
         self.received_item = item
-        self.target_path = None
-        self.display_value = ''
         self.preview_image: Gio.File or str = 'paper-symbolic'
         self.gfile = None
-        self.size = 0
         self.async_load = False
         self.dynamic_size = dynamic_size
-        self.content_is_text = False
         self.is_clipboard = is_clipboard
 
         logging.debug(f'Creating item from type: {type(item)}')
@@ -50,22 +49,20 @@ class DroppedItem():
 
         if isinstance(item, Gio.File):
             self.gfile = item
-            self.target_path = item.get_path()
-            self.display_value = item.get_basename()  
-            self.size = self.get_size(True)
-            self.generate_preview_for_image()
+            self.set_file(item.get_path())
+
+            if self.is_clipboard:
+                self.size = self.get_size(True)
+            else:
+                # size and preview are loaded by complete_load, outside the main thread
+                self.async_load = True
 
         elif isinstance(item, str):
-            base_filename = 'collected_text_'
-            text_string = item
-            self.content_is_text = True
+            self.set_text(item, ignore_urls=(ignore_urls or is_clipboard))
+            self.gfile = Gio.File.new_for_path(self.target_path)
 
             self.preview_image = 'font-x-generic-symbolic'
-            if ignore_urls == False and is_clipboard == False and \
-                  (text_string.startswith('http://') or text_string.startswith('https://')):
-                
-                logging.debug(f'Found http url: {text_string}')
-                base_filename = 'collected_link_'
+            if self.is_link:
                 self.preview_image = 'chain-link-symbolic'
                 
                 settings = get_gsettings()
@@ -73,16 +70,6 @@ class DroppedItem():
 
                 if should_download_images:
                     self.async_load = True
-
-
-            self.target_path = get_safe_path(f'{self.DROPS_DIR}/{base_filename}', 'txt')
-            with open(self.target_path, 'w+') as f:
-                f.write(text_string)
-
-            self.gfile = Gio.File.new_for_path(self.target_path)
-            self.size = len(text_string)
-
-            self.set_display_value(text_string)
         else:
             raise DroppedItemNotSupportedException(msg=f'item of type {type(item)} not supported')
         
@@ -95,14 +82,7 @@ class DroppedItem():
         
         return self.gfile.query_info('standard::', Gio.FileQueryInfoFlags.NONE, None).get_size()
 
-    def get_text_content(self):
-        if self.content_is_text:
-            with open(self.target_path, 'r') as f:
-                return f.read()
-        else:
-            with open(self.target_path, 'rb') as f:
-                return base64.b64encode(f.read()).decode()
-
+    @traced('DroppedItem.complete_load')
     def complete_load(self):
         logging.debug(f'Completing load for {self.received_item}')
 
@@ -116,79 +96,118 @@ class DroppedItem():
             if not should_download_images:
                 return
 
-            text_content = ''
-            with open(self.gfile.get_path(), 'r') as f:
-                text_content = f.read()
+            max_size = settings.get_int('max-download-size-mb') * (1024 * 1024)
+            google_images_support = settings.get_boolean('google-images-support')
 
-            (is_image, img_link) = link_is_image(text_content)
-
-            if not is_image:
-                logging.debug(f'URL does not seem to be an image: {img_link}')
+            if not self.download_link(max_size, google_images_support):
                 return
 
-            try:
-                data, filename, content_type = download_file(img_link)
-            except Exception as e:
-                logging.warn(e)
-                return
-            
-            # write tmp file: this ensures support for binary files
-            # to be downloaded and analysed
-            tmp_path = f'{self.DROPS_DIR}/{get_random_string(10)}'
-            with open(tmp_path, 'wb') as f:
-                f.write(data)
-
-            tmp_file = Gio.file_new_for_path(tmp_path)
-            tmp_file_content_type = get_giofile_content_type(tmp_file)
-
-            if not tmp_file_content_type in SUPPORTED_IMG_TYPES:
-                tmp_file.delete(None)
-                return
-            
-            extension = tmp_file_content_type.split('/')[1]
-            if extension == 'svg+xml':
-                extension = 'svg'
+            self.gfile = Gio.File.new_for_path(self.target_path)
+            self.generate_preview_for_image()
+        else:
+            self.reload()
 
-            base_name = os.path.splitext(filename)[0]
-            self.target_path = get_safe_path(f'{self.DROPS_DIR}/{base_name}', extension)
+        self.async_load = False
 
-            self.gfile = Gio.File.new_for_path(self.target_path)
-            tmp_file.move(self.gfile, Gio.FileCopyFlags.OVERWRITE)
+    def reload(self):
+        self.load_info()
+        self.generate_preview_for_image()
 
-            self.display_value = self.set_display_value(img_link)
-            self.size = self.get_size(True)
-            self.content_is_text = False
+    def set_missing(self):
+        self.size = 0
+        self.is_directory = False
+        self.preview_image = 'action-unavailable-symbolic'
 
-            self.generate_preview_for_image()
+    def get_content_type(self) -> str:
+        with span('item.query_content_type'):
+            return get_giofile_content_type(self.gfile)
 
-        self.async_load = False
+    def can_render_preview(self, content_type: str) -> bool:
+        return super().can_render_preview(content_type) or content_type in SVG_TYPES
 
     def generate_preview_for_image(self):
-        content_type = get_giofile_content_type(self.gfile)
+        content_type = self.get_content_type()
+
+        if not content_type in SVG_TYPES:
+            with span('item.system_thumbnail'):
+                if self.load_system_thumbnail():
+                    return
+
+        try:
+            preview_path = self.get_preview(content_type)
+        except Exception as e:
+            # e.g. a malformed image or a missing pixbuf loader, the file gets its icon instead
+            logging.warn(f'Could not generate preview for {self.target_path}: {e}')
+            preview_path = None
+
+        if preview_path:
+            self.preview_image = Gio.File.new_for_path(preview_path)
+        else:
+            with span('item.query_icon'):
+                info = self.gfile.query_info('standard::icon' , 0 , Gio.Cancellable())
+                self.preview_image = info.get_icon()
 
-        if content_type in SUPPORTED_IMG_TYPES and self.size < (self.MAX_PREVIEW_SIZE_MB * (1024 * 1024)):
-            logging.debug(f'Generating preview image for: {self.target_path}')
+    def render_preview(self, content_type: str, preview_path: str) -> str:
+        if content_type in SVG_TYPES:
+            return self.rasterize_svg(preview_path)
 
-            extension = os.path.splitext(self.target_path)[1]
+        system_thumbnail = None
+        if get_gsettings().get_boolean('write-system-thumbnails'):
+            uri = get_thumbnail_uri(self.gfile, [self.DROPS_DIR])
 
-            filehash = get_file_hash(self.gfile)
-            preview_path = f'{self.DROPS_DIR}/__{filehash}.{extension}'
+            if uri:
+                system_thumbnail = get_system_thumbnail_target(self.gfile, uri)
 
-            if content_type not in ['image/svg', 'image/svg+xml']:
-                image = self.crop_image(self.target_path)
-                image.save(preview_path, format='png')
-                self.preview_image = Gio.File.new_for_path(preview_path)
-            else:
-                self.preview_image = self.gfile
-        else:
-            info = self.gfile.query_info('standard::icon' , 0 , Gio.Cancellable())
-            self.preview_image = info.get_icon()
+        return self.thumbnail_pool.render_preview(self.target_path, preview_path, 
+            system_thumbnail=system_thumbnail)
+
+    def load_system_thumbnail(self) -> bool:
+        """Uses the thumbnail made by the file manager, if any, instead of decoding the file"""
+        uri = get_thumbnail_uri(self.gfile, [self.DROPS_DIR])
+        if not uri:
+            return False
+
+        try:
+            thumb_path = lookup_system_thumbnail(self.gfile, uri)
+        except Exception as e:
+            logging.debug(f'Could not look up system thumbnail: {e}')
+            return False
+
+        if not thumb_path:
+            return False
+
+        cache_key = f'{os.path.splitext(get_thumbnail_name(uri))[0]}_{get_file_mtime(self.gfile)}'
+        preview_path = self.thumbnail_cache.get(cache_key)
+
+        if not preview_path:
+            image = self.crop_image(thumb_path)
+            preview_path = self.thumbnail_cache.put(cache_key, image)
+
+        self.preview_image = Gio.File.new_for_path(preview_path)
+        return True
+
+    def rasterize_svg(self, preview_path: str) -> str:
+        """Renders the SVG once, so that GTK doesn't have to parse the full document for every widget"""
+        logging.debug(f'Rasterizing SVG: {self.target_path}')
+
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(self.target_path, 
+            PREVIEW_SIZE, PREVIEW_SIZE, True)
+
+        width, height = pixbuf.get_width(), pixbuf.get_height()
+        size = min(width, height)
+        pixbuf = pixbuf.new_subpixbuf((width - size) // 2, (height - size) // 2, size, size)
+
+        os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+        tmp_path = f'{preview_path}.{get_random_string(10)}.tmp'
+        pixbuf.savev(tmp_path, 'png', [], [])
+        os.replace(tmp_path, preview_path)
+
+        return preview_path
 
     def crop_image(self, image_path):
         logging.debug(f'Cropping image: {image_path}')
 
-        image = Image.open(image_path)
-        image.thumbnail((200, 200))
+        image = load_image_thumbnail(image_path)
         image = pillow_crop_center(image, min(image.size))
         return image
     
@@ -198,8 +217,3 @@ class DroppedItem():
 
         file = Gio.File.new_for_path(tmp_filename)
         return file
-
-    def set_display_value(self, text):
-        self.display_value = text[:25]
-        if len(text) > 26:
-            self.display_value = self.display_value + '...'
\ No newline at end of file
@@ -0,0 +1,101 @@
+import logging
+from typing import Callable, Optional
+
+from gi.repository import Gio, GLib
+
+from .CarouselItem import CarouselItem
+
+class FileWatcher():
+    """Watches dropped files and reports changes in batches"""
+
+    # events received within this time are delivered together, 
+    # so that a file being written does not flood the main loop
+    COALESCE_MS = 500
+
+    CHANGE_EVENTS = [
+        Gio.FileMonitorEvent.CHANGED,
+        Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+        Gio.FileMonitorEvent.ATTRIBUTE_CHANGED,
+        Gio.FileMonitorEvent.CREATED,
+        Gio.FileMonitorEvent.MOVED_IN,
+    ]
+
+    DELETE_EVENTS = [
+        Gio.FileMonitorEvent.DELETED,
+        Gio.FileMonitorEvent.MOVED_OUT,
+        Gio.FileMonitorEvent.RENAMED,
+    ]
+
+    def __init__(self, on_files_changed: Callable[[list[CarouselItem]], None], 
+                 on_files_deleted: Callable[[list[CarouselItem]], None]) -> None:
+        self.on_files_changed = on_files_changed
+        self.on_files_deleted = on_files_deleted
+
+        self.monitors: dict[CarouselItem, Gio.FileMonitor] = {}
+
+        # True if the file has changed, False if it has been deleted
+        self.pending: dict[CarouselItem, bool] = {}
+        self.flush_source: Optional[int] = None
+
+    def watch(self, carousel_item: CarouselItem):
+        if carousel_item in self.monitors:
+            return
+
+        gfile = carousel_item.dropped_item.gfile
+
+        try:
+            monitor = gfile.monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            logging.warn(f'Cannot watch {gfile.get_path()}: {e}')
+            return
+
+        logging.debug(f'Watching {gfile.get_path()}')
+        monitor.set_rate_limit(self.COALESCE_MS)
+        monitor.connect('changed', self.on_monitor_changed, carousel_item)
+        self.monitors[carousel_item] = monitor
+
+    def unwatch(self, carousel_item: CarouselItem):
+        monitor = self.monitors.pop(carousel_item, None)
+        self.pending.pop(carousel_item, None)
+
+        if monitor:
+            monitor.cancel()
+
+    def unwatch_all(self):
+        for monitor in self.monitors.values():
+            monitor.cancel()
+
+        self.monitors = {}
+        self.pending = {}
+
+        if self.flush_source:
+            GLib.source_remove(self.flush_source)
+            self.flush_source = None
+
+    def on_monitor_changed(self, monitor, file, other_file, event_type, carousel_item: CarouselItem):
+        if event_type in self.CHANGE_EVENTS:
+            self.pending[carousel_item] = True
+        elif event_type in self.DELETE_EVENTS:
+            self.pending[carousel_item] = False
+        else:
+            return
+
+        if not self.flush_source:
+            self.flush_source = GLib.timeout_add(self.COALESCE_MS, self.flush)
+
+    def flush(self):
+        self.flush_source = None
+
+        changed = [c for c, exists in self.pending.items() if exists]
+        deleted = [c for c, exists in self.pending.items() if not exists]
+        self.pending = {}
+
+        logging.debug(f'Watched files: {len(changed)} changed, {len(deleted)} deleted')
+
+        if changed:
+            self.on_files_changed(changed)
+
+        if deleted:
+            self.on_files_deleted(deleted)
+
+        return GLib.SOURCE_REMOVE
@@ -0,0 +1,131 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import logging
+from typing import Optional
+from email.utils import parsedate_to_datetime
+
+from .DiskCache import DiskCache
+from .files import get_user_cache_dir, get_random_string
+
+class HttpCache(DiskCache):
+    """Responses of dropped links, revalidated with ETag and Last-Modified"""
+
+    CACHE_PATH = get_user_cache_dir() + '/http'
+    MAX_SIZE_MB = 256
+
+    # headers kept with every entry
+    STORED_HEADERS = ['content-type', 'content-length', 'content-disposition', 'etag', 'last-modified']
+
+    # responses without explicit freshness are fresh for 10% of their age, up to this limit
+    MAX_HEURISTIC_FRESHNESS_S = 24 * 60 * 60
+
+    def get_entry_key(self, filename: str) -> str:
+        # the body and its metadata are named after the hash of the url
+        return filename.removesuffix('.json')
+
+    def get_key(self, url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get_body_path(self, url: str) -> str:
+        return f'{self.CACHE_PATH}/{self.get_key(url)}'
+
+    def get_meta_path(self, url: str) -> str:
+        return f'{self.CACHE_PATH}/{self.get_key(url)}.json'
+
+    def get_entry(self, url: str) -> Optional[dict]:
+        body_path = self.get_body_path(url)
+        meta_path = self.get_meta_path(url)
+
+        if not self.touch(body_path) or not self.touch(meta_path):
+            return None
+
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.debug(f'Invalid HTTP cache entry for {url}: {e}')
+            return None
+
+        entry['body_path'] = body_path
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() < entry.get('expires_at', 0)
+
+    def get_conditional_headers(self, entry: dict) -> dict:
+        headers = {}
+        stored_headers = entry.get('headers', {})
+
+        if stored_headers.get('etag', None):
+            headers['If-None-Match'] = stored_headers['etag']
+
+        if stored_headers.get('last-modified', None):
+            headers['If-Modified-Since'] = stored_headers['last-modified']
+
+        return headers
+
+    def is_cacheable(self, response_headers) -> bool:
+        cache_control = response_headers.get('cache-control', '').lower()
+        return 'no-store' not in cache_control and 'private' not in cache_control
+
+    def get_expiration(self, response_headers) -> float:
+        now = time.time()
+        cache_control = response_headers.get('cache-control', '').lower()
+
+        if 'no-cache' in cache_control:
+            return now
+
+        max_age = re.findall(r'max-age=(\d+)', cache_control)
+        if max_age:
+            return now + int(max_age[0])
+
+        try:
+            if response_headers.get('expires', None):
+                return parsedate_to_datetime(response_headers['expires']).timestamp()
+
+            if response_headers.get('last-modified', None):
+                last_modified = parsedate_to_datetime(response_headers['last-modified']).timestamp()
+                return now + min((now - last_modified) / 10, self.MAX_HEURISTIC_FRESHNESS_S)
+        except (TypeError, ValueError):
+            pass
+
+        return now
+
+    def get_tmp_body_path(self, url: str) -> str:
+        os.makedirs(self.CACHE_PATH, exist_ok=True)
+        return f'{self.get_body_path(url)}.{os.getpid()}.{get_random_string(10)}.tmp'
+
+    def put(self, url: str, tmp_body_path: str, response_headers):
+        entry = {
+            'url': url,
+            'headers': {h: response_headers[h] for h in self.STORED_HEADERS if response_headers.get(h, None)},
+            'expires_at': self.get_expiration(response_headers),
+        }
+
+        self.write_meta(url, entry)
+        os.replace(tmp_body_path, self.get_body_path(url))
+
+        self.add(self.get_body_path(url), self.get_meta_path(url))
+
+    def refresh(self, url: str, entry: dict, response_headers):
+        """Updates the expiration of an entry after a 304 Not Modified response"""
+        entry = {k: v for k, v in entry.items() if k != 'body_path'}
+        entry['expires_at'] = self.get_expiration(response_headers)
+
+        self.write_meta(url, entry)
+
+    def write_meta(self, url: str, entry: dict):
+        meta_path = self.get_meta_path(url)
+        tmp_path = f'{meta_path}.{os.getpid()}.{get_random_string(10)}.tmp'
+
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+
+        os.replace(tmp_path, meta_path)
+
+    def copy_body(self, entry: dict, target_path: str):
+        shutil.copyfile(entry['body_path'], target_path)
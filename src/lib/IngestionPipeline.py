@@ -0,0 +1,86 @@
+import os
+import logging
+import threading
+import urllib.parse
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import GLib
+
+from .CarouselItem import CarouselItem
+from .DownloadScheduler import DownloadScheduler
+from .utils import get_gsettings
+
+class IngestionPipeline():
+    MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+    # max number of items handed back to the UI on every idle callback
+    BATCH_SIZE = 32
+
+    # shared by every window, so that the limits are global
+    download_scheduler = DownloadScheduler()
+
+    def __init__(self, on_items_loaded: Callable[[list[CarouselItem]], None]) -> None:
+        self.on_items_loaded = on_items_loaded
+        # every thread waits for one thumbnail process, so there must be enough to keep them all busy
+        max_workers = max(self.MAX_WORKERS, get_gsettings().get_int('thumbnail-processes'))
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='collector-ingestion'
+        )
+
+        self.lock = threading.Lock()
+        self.loaded_items: list[CarouselItem] = []
+        self.flush_scheduled = False
+        self.is_shutdown = False
+
+    def submit(self, carousel_items: list[CarouselItem], reload=False):
+        for carousel_item in carousel_items:
+            received_item = carousel_item.dropped_item.received_item
+
+            if not reload and isinstance(received_item, str):
+                # links are downloaded by the scheduler, they don't block the loading of files
+                host = urllib.parse.urlparse(received_item.strip()).netloc
+                self.download_scheduler.submit(host, lambda c=carousel_item: self.load_item(c))
+            else:
+                self.executor.submit(self.load_item, carousel_item, reload)
+
+    def load_item(self, carousel_item: CarouselItem, reload=False):
+        if self.is_shutdown or carousel_item.dropped_item.is_cancelled():
+            return
+
+        try:
+            if reload:
+                carousel_item.dropped_item.reload()
+            else:
+                carousel_item.dropped_item.complete_load()
+        except Exception as e:
+            logging.error(f'Could not load item {carousel_item.dropped_item.received_item}: {e}')
+
+        with self.lock:
+            self.loaded_items.append(carousel_item)
+
+            if not self.flush_scheduled:
+                self.flush_scheduled = True
+                GLib.idle_add(self.flush)
+
+    def flush(self):
+        with self.lock:
+            batch = self.loaded_items[:self.BATCH_SIZE]
+            del self.loaded_items[:self.BATCH_SIZE]
+
+            has_more = len(self.loaded_items) > 0
+            self.flush_scheduled = has_more
+
+        if self.is_shutdown:
+            return GLib.SOURCE_REMOVE
+
+        logging.debug(f'Delivering {len(batch)} loaded items')
+        self.on_items_loaded(batch)
+
+        return GLib.SOURCE_CONTINUE if has_more else GLib.SOURCE_REMOVE
+
+    def shutdown(self):
+        self.is_shutdown = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+import os
+import base64
+import logging
+import threading
+from typing import Optional
+
+from .constants import SUPPORTED_IMG_TYPES, BINARY_CONTENT_TYPES
+from .files import get_file_hash, get_file_content_type, get_safe_path
+from .links import is_link, resolve_link, link_has_image_extension, link_is_image, download_file
+from .thumbnails import render_preview
+from .ThumbnailCache import ThumbnailCache
+from .tracing import span, count
+
+SVG_TYPES = ['image/svg', 'image/svg+xml']
+
+class Item():
+    """Dropped file, text or link, without any dependency on the display.
+
+    DroppedItem adds what is only available with GTK, e.g. icons and SVG rendering.
+    """
+
+    MAX_PREVIEW_SIZE_MB = 50
+    thumbnail_cache = ThumbnailCache()
+
+    def __init__(self, drops_dir) -> None:
+        self.DROPS_DIR = drops_dir
+
+        self.target_path = None
+        self.display_value = ''
+        self.size = 0
+        self.content_is_text = False
+        self.is_link = False
+        self.is_directory = False
+        self.cancelled = threading.Event()
+
+    def set_file(self, path: str):
+        self.target_path = path
+        self.display_value = os.path.basename(path)
+
+    def set_text(self, text_string: str, ignore_urls=False):
+        """Saves the text in the drops dir, links are saved as well and can be downloaded later"""
+        base_filename = 'collected_text_'
+        self.content_is_text = True
+
+        if not ignore_urls and is_link(text_string):
+            logging.debug(f'Found http url: {text_string}')
+            base_filename = 'collected_link_'
+            self.is_link = True
+
+        with span('item.save_text', size=len(text_string)):
+            self.target_path = get_safe_path(f'{self.DROPS_DIR}/{base_filename}', 'txt')
+            with open(self.target_path, 'w+') as f:
+                f.write(text_string)
+
+        self.size = len(text_string)
+        self.set_display_value(text_string)
+
+    def get_text_content(self):
+        if self.content_is_text:
+            with open(self.target_path, 'r') as f:
+                return f.read()
+        else:
+            with open(self.target_path, 'rb') as f:
+                return base64.b64encode(f.read()).decode()
+
+    def load_info(self):
+        with span('item.stat'):
+            stat = os.stat(self.target_path)
+            self.is_directory = os.path.isdir(self.target_path)
+
+        # the size of directories is computed by DirectorySizeWalker
+        self.size = 0 if self.is_directory else stat.st_size
+
+    def get_content_type(self) -> str:
+        return get_file_content_type(self.target_path)
+
+    def download_link(self, max_size: int, google_images_support=False) -> bool:
+        """Replaces the saved link with the image it points to, returns False if it's not an image"""
+        with open(self.target_path, 'r') as f:
+            text_content = f.read()
+
+        img_link = resolve_link(text_content, google_images_support)
+
+        # the HEAD request is only needed when the URL doesn't tell what it links to,
+        # otherwise the content type is checked on the response of the download
+        if link_has_image_extension(img_link):
+            logging.debug(f'URL has an image extension, skipping HEAD request: {img_link}')
+        else:
+            with span('item.link_is_image'):
+                (is_image, img_link) = link_is_image(text_content, google_images_support)
+
+            if not is_image:
+                logging.debug(f'URL does not seem to be an image: {img_link}')
+                return False
+
+        try:
+            with span('item.download_file', url=img_link):
+                download = download_file(img_link, max_size, self.get_download_target_path,
+                    allowed_content_types=(SUPPORTED_IMG_TYPES + BINARY_CONTENT_TYPES),
+                    cancelled=self.cancelled)
+        except Exception as e:
+            logging.warn(e)
+            return False
+
+        if not download:
+            return False
+
+        self.target_path = download[0]
+
+        self.set_display_value(img_link)
+        self.size = os.path.getsize(self.target_path)
+        self.content_is_text = False
+
+        return True
+
+    def get_download_target_path(self, filename: str, content_type: str):
+        # the content type is sniffed from the first bytes, binary files are supported too
+        if not content_type in SUPPORTED_IMG_TYPES:
+            return None
+
+        extension = content_type.split('/')[1]
+        if extension == 'svg+xml':
+            extension = 'svg'
+
+        base_name = os.path.splitext(filename)[0]
+        return get_safe_path(f'{self.DROPS_DIR}/{base_name}', extension)
+
+    def cancel(self):
+        """Stops loading the item, e.g. when it is removed before the download is complete"""
+        self.cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def can_render_preview(self, content_type: str) -> bool:
+        # SVG documents can't be decoded by Pillow
+        return content_type in SUPPORTED_IMG_TYPES and not content_type in SVG_TYPES
+
+    def get_preview(self, content_type: Optional[str] = None) -> Optional[str]:
+        """Returns the path of the cached preview of the image, or None if it has no preview"""
+        content_type = content_type or self.get_content_type()
+
+        if not self.can_render_preview(content_type) or \
+                self.size >= (self.MAX_PREVIEW_SIZE_MB * (1024 * 1024)):
+            return None
+
+        logging.debug(f'Generating preview image for: {self.target_path}')
+
+        with span('item.hash', size=self.size):
+            filehash = get_file_hash(self.target_path, alg='blake2b')
+
+        preview_path = self.thumbnail_cache.get(filehash)
+        count('thumbnail_cache.hit' if preview_path else 'thumbnail_cache.miss')
+
+        if not preview_path:
+            with span('item.render_preview', content_type=content_type):
+                preview_path = self.render_preview(content_type, self.thumbnail_cache.get_path(filehash))
+
+            self.thumbnail_cache.add(preview_path)
+
+        return preview_path
+
+    def render_preview(self, content_type: str, preview_path: str) -> str:
+        return render_preview(self.target_path, preview_path)
+
+    def set_display_value(self, text):
+        self.display_value = text[:25]
+        if len(text) > 26:
+            self.display_value = self.display_value + '...'
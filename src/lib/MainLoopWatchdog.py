@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import traceback
+from typing import Optional
+
+from gi.repository import GLib
+
+class MainLoopWatchdog():
+    """Logs the Python stack of the main thread when the main loop doesn't run for too long"""
+
+    # how often the main loop reports that it's alive
+    HEARTBEAT_INTERVAL_MS = 50
+
+    def __init__(self, threshold_ms: int) -> None:
+        self.threshold_ms = threshold_ms
+        self.main_thread_id = threading.main_thread().ident
+        self.last_heartbeat = time.monotonic()
+        self.stalls: list[dict] = []
+        self.current_stall: Optional[dict] = None
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.heartbeat_source: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.heartbeat_source = GLib.timeout_add(self.HEARTBEAT_INTERVAL_MS, self.on_heartbeat)
+        self.thread = threading.Thread(target=self.watch, name='collector-watchdog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+        if self.heartbeat_source:
+            GLib.source_remove(self.heartbeat_source)
+            self.heartbeat_source = None
+
+        if self.thread:
+            self.thread.join()
+
+    def on_heartbeat(self):
+        with self.lock:
+            now = time.monotonic()
+
+            if self.current_stall:
+                self.current_stall['duration_ms'] = round((now - self.last_heartbeat) * 1000)
+                logging.warn(f'Main loop was blocked for {self.current_stall["duration_ms"]} ms')
+                self.current_stall = None
+
+            self.last_heartbeat = now
+
+        return GLib.SOURCE_CONTINUE
+
+    def watch(self):
+        while not self.stopped.wait(self.HEARTBEAT_INTERVAL_MS / 1000):
+            with self.lock:
+                blocked_ms = (time.monotonic() - self.last_heartbeat) * 1000
+
+                # the stack is recorded once for every stall, when it crosses the threshold
+                if self.current_stall or blocked_ms < self.HEARTBEAT_INTERVAL_MS + self.threshold_ms:
+                    continue
+
+                frame = sys._current_frames().get(self.main_thread_id, None)
+                stack = traceback.format_stack(frame) if frame else []
+
+                self.current_stall = {
+                    'started_at': time.time() - (blocked_ms / 1000),
+                    'duration_ms': round(blocked_ms),
+                    'stack': stack,
+                }
+
+                self.stalls.append(self.current_stall)
+
+            logging.warn(f'Main loop blocked for more than {self.threshold_ms} ms:\n' + ''.join(stack))
+
+    def dump(self, folder: str, name: str) -> Optional[str]:
+        """Writes the recorded stalls as JSON, returns the path of the file"""
+        if not self.stalls:
+            return None
+
+        os.makedirs(folder, exist_ok=True)
+        path = f'{folder}/stalls-{name}.json'
+
+        with self.lock:
+            with open(path, 'w') as f:
+                json.dump({'threshold_ms': self.threshold_ms, 'stalls': self.stalls}, f, indent=2)
+
+        return path
@@ -0,0 +1,89 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from typing import Optional
+
+class Profiler():
+    """CPU and memory profiles of a whole run, enabled with APP_PROFILE=cpu,memory"""
+
+    MODES = ['cpu', 'memory']
+
+    # frames kept for every allocation, more frames make tracemalloc slower
+    TRACEMALLOC_FRAMES = 25
+
+    # lines written in the text reports
+    REPORT_LINES = 50
+
+    def __init__(self, modes: list[str]) -> None:
+        self.modes = [m for m in modes if m in self.MODES]
+        self.cpu_profile: Optional[cProfile.Profile] = None
+        self.memory_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.memory_peak = 0
+        self.started_at = time.strftime('%Y%m%d-%H%M%S')
+
+    def start(self):
+        if 'memory' in self.modes:
+            tracemalloc.start(self.TRACEMALLOC_FRAMES)
+
+        if 'cpu' in self.modes:
+            # only the main thread is profiled, it's the one that freezes the window
+            self.cpu_profile = cProfile.Profile()
+            self.cpu_profile.enable()
+
+        logging.warn(f'Profiling enabled: {", ".join(self.modes)}')
+
+    def stop(self):
+        if self.cpu_profile:
+            self.cpu_profile.disable()
+
+        if tracemalloc.is_tracing():
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def dump(self, folder: str) -> list[str]:
+        """Writes the reports and returns their paths"""
+        os.makedirs(folder, exist_ok=True)
+        paths = []
+
+        if self.cpu_profile:
+            # the .prof file can be opened with snakeviz or pstats
+            prof_path = f'{folder}/profile-{self.started_at}.prof'
+            self.cpu_profile.dump_stats(prof_path)
+
+            text = io.StringIO()
+            stats = pstats.Stats(self.cpu_profile, stream=text)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.REPORT_LINES)
+
+            txt_path = f'{folder}/profile-{self.started_at}.txt'
+            with open(txt_path, 'w') as f:
+                f.write(text.getvalue())
+
+            paths += [prof_path, txt_path]
+
+        if self.memory_snapshot:
+            memory_path = f'{folder}/memory-{self.started_at}.txt'
+            snapshot = self.memory_snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+
+            with open(memory_path, 'w') as f:
+                f.write(f'Peak traced memory: {self.memory_peak / (1024 * 1024):.1f} MB\n\n')
+                f.write(f'Top {self.REPORT_LINES} allocations by line:\n')
+
+                for stat in snapshot.statistics('lineno')[:self.REPORT_LINES]:
+                    f.write(f'{stat}\n')
+
+                f.write(f'\nTop 10 allocations with their traceback:\n')
+                for stat in snapshot.statistics('traceback')[:10]:
+                    f.write(f'\n{stat}\n')
+                    f.write('\n'.join(stat.traceback.format()) + '\n')
+
+            paths.append(memory_path)
+
+        return paths
@@ -0,0 +1,118 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Optional
+from PIL import Image
+
+from gi.repository import Gio, GLib
+
+# thumbnails shared with file managers, see
+# https://specifications.freedesktop.org/thumbnail-spec/latest/
+if os.environ.get('FLATPAK_ID', None):
+    SYSTEM_THUMBNAILS_PATH = os.environ.get('HOST_XDG_CACHE_HOME', os.path.expanduser('~/.cache')) + '/thumbnails'
+else:
+    SYSTEM_THUMBNAILS_PATH = GLib.get_user_cache_dir() + '/thumbnails'
+
+# files exposed by the document portal, their path in the sandbox is not the one known by the host
+DOCUMENT_PORTAL_PATHS = [GLib.get_user_runtime_dir() + '/doc/', '/run/flatpak/doc/']
+DOCUMENT_PORTAL_TIMEOUT_MS = 1000
+
+# document id -> host path of the document, None if the portal can't resolve it
+_document_host_paths: dict[str, Optional[str]] = {}
+_document_host_paths_lock = threading.Lock()
+
+# ordered by preference: the smallest size that is bigger than our previews comes first
+THUMBNAIL_SIZES = {'large': 256, 'normal': 128, 'x-large': 512, 'xx-large': 1024}
+
+def get_document_host_path(doc_id: str) -> Optional[str]:
+    with _document_host_paths_lock:
+        if doc_id in _document_host_paths:
+            return _document_host_paths[doc_id]
+
+    host_path = None
+
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        result = bus.call_sync('org.freedesktop.portal.Documents', '/org/freedesktop/portal/documents',
+            'org.freedesktop.portal.Documents', 'GetHostPaths', GLib.Variant('(as)', [doc_id]),
+            GLib.VariantType('(a{say})'), Gio.DBusCallFlags.NONE, DOCUMENT_PORTAL_TIMEOUT_MS, None)
+
+        # paths are NUL terminated byte strings
+        host_paths = result.unpack()[0]
+        if doc_id in host_paths:
+            host_path = os.fsdecode(bytes(host_paths[doc_id]).rstrip(b'\0'))
+    except Exception as e:
+        logging.debug(f'Could not resolve the host path of document {doc_id}: {e}')
+
+    with _document_host_paths_lock:
+        _document_host_paths[doc_id] = host_path
+
+    return host_path
+
+def get_host_path(path: str) -> Optional[str]:
+    """Path of the file on the host, for files exposed by the document portal"""
+    portal_dir = next((d for d in DOCUMENT_PORTAL_PATHS if path.startswith(d)), None)
+    if not portal_dir:
+        return path
+
+    # <portal dir>/<doc id>/<document name>[/<path inside a directory document>]
+    doc_id, _, document_path = path[len(portal_dir):].partition('/')
+    if not document_path:
+        return None
+
+    host_path = get_document_host_path(doc_id)
+    if not host_path:
+        return None
+
+    return os.path.join(os.path.dirname(host_path), document_path)
+
+def get_thumbnail_uri(file: Gio.File, private_dirs: list[str]) -> Optional[str]:
+    """URI of the file as file managers know it, None if its thumbnail should not be shared.
+
+    Thumbnails of temporary files would never be used by file managers.
+    """
+    path = file.get_path()
+    if not path or any(path.startswith(d.rstrip('/') + '/') for d in private_dirs):
+        return None
+
+    host_path = get_host_path(path)
+    if not host_path:
+        return None
+
+    return GLib.filename_to_uri(host_path, None)
+
+def get_thumbnail_name(uri: str) -> str:
+    return hashlib.md5(uri.encode()).hexdigest() + '.png'
+
+def get_file_mtime(file: Gio.File) -> int:
+    return int(os.stat(file.get_path()).st_mtime)
+
+def lookup_system_thumbnail(file: Gio.File, uri: str) -> Optional[str]:
+    name = get_thumbnail_name(uri)
+    mtime = get_file_mtime(file)
+
+    for size in THUMBNAIL_SIZES.keys():
+        thumb_path = f'{SYSTEM_THUMBNAILS_PATH}/{size}/{name}'
+
+        if not os.path.exists(thumb_path):
+            continue
+
+        try:
+            with Image.open(thumb_path) as thumb:
+                thumb_mtime = thumb.info.get('Thumb::MTime', None)
+        except Exception as e:
+            logging.debug(f'Invalid system thumbnail {thumb_path}: {e}')
+            continue
+
+        # the thumbnail is outdated if the file has been modified after its creation
+        if thumb_mtime and int(thumb_mtime) == mtime:
+            logging.debug(f'Found system thumbnail for {file.get_path()}: {thumb_path}')
+            return thumb_path
+
+    return None
+
+def get_system_thumbnail_target(file: Gio.File, uri: str) -> tuple[str, str, int]:
+    thumb_path = f'{SYSTEM_THUMBNAILS_PATH}/normal/{get_thumbnail_name(uri)}'
+    return (thumb_path, uri, get_file_mtime(file))
+
@@ -0,0 +1,167 @@
+import io
+import csv
+import os
+import mmap
+from array import array
+from typing import Optional
+
+from .TextSearchIndex import TextSearchIndex
+from .files import get_safe_path
+
+def parse_csv_rows(data: bytes) -> list[str]:
+    text = data.decode()
+    return [row[0] if row else '' for row in csv.reader(io.StringIO(text, newline=''))]
+
+class TextCollection():
+    """Collected strings, stored as the rows of a CSV file"""
+
+    # collected rows are written to disk as soon as the buffer reaches this size
+    FLUSH_THRESHOLD_BYTES = 64 * 1024
+
+    # rows parsed at once when searching without the full-text index
+    SEARCH_CHUNK_ROWS = 1000
+
+    def __init__(self, drop_dir) -> None:
+        self.DROP_DIR = drop_dir
+        self.FILENAME = get_safe_path(f'{drop_dir}/collected_strings_', 'csv')
+        self.text_pieces = 0
+        self.size = 0
+
+        self.buffer: list[bytes] = []
+        self.buffer_size = 0
+        self.file = open(self.FILENAME, 'wb')
+
+        # byte offset of every row, so that any row can be read without parsing the whole file
+        self.row_offsets = array('Q')
+        self.mmap: Optional[mmap.mmap] = None
+        self.search_index = TextSearchIndex()
+
+    def append_text(self, text: str):
+        self.text_pieces += 1
+
+        row = io.StringIO()
+        writer = csv.writer(row)
+        writer.writerow([text])
+        data = row.getvalue().encode()
+
+        self.buffer.append(data)
+        self.buffer_size += len(data)
+        self.search_index.add(len(self.row_offsets), text)
+        self.row_offsets.append(self.size)
+
+        # keep track of the file size without querying the file system
+        self.size += len(data)
+
+        if self.buffer_size >= self.FLUSH_THRESHOLD_BYTES:
+            self.flush()
+        else:
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        """Called when rows are left in the buffer, the rows are written at the latest on the next read"""
+        pass
+
+    def flush(self):
+        """Writes the buffered rows to disk, must be called before reading the file"""
+        if not self.buffer or not self.file:
+            return
+
+        # only complete rows are written in a single call, so a crash never leaves half a row;
+        # there is no fsync, it would block the main thread on slow disks
+        self.file.write(b''.join(self.buffer))
+        self.file.flush()
+
+        self.buffer = []
+        self.buffer_size = 0
+
+    def close(self):
+        self.flush()
+
+        if self.mmap:
+            self.mmap.close()
+            self.mmap = None
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def clear(self):
+        self.buffer = []
+        self.buffer_size = 0
+        self.close()
+
+        self.text_pieces = 0
+        self.size = 0
+        self.row_offsets = array('Q')
+        self.search_index.clear()
+        if os.path.exists(self.FILENAME):
+            os.remove(self.FILENAME)
+
+    def get_copied_text(self) -> list[str]:
+        return self.get_rows(0)
+
+    def get_row_count(self) -> int:
+        return len(self.row_offsets)
+
+    def get_row(self, index: int) -> str:
+        rows = self.get_rows(index, index + 1)
+        return rows[0] if rows else ''
+
+    def get_last_rows(self, count: int) -> list[str]:
+        return self.get_rows(max(0, self.get_row_count() - count))
+
+    def get_rows(self, start: int, end: Optional[int] = None) -> list[str]:
+        """Parses the rows from start to end (excluded), only reading their bytes from the file"""
+        row_count = self.get_row_count()
+        end = row_count if end is None else min(end, row_count)
+
+        if start >= end:
+            return []
+
+        data = self.get_mmap()
+        start_offset = self.row_offsets[start]
+        end_offset = self.row_offsets[end] if end < row_count else self.size
+
+        return parse_csv_rows(data[start_offset:end_offset])
+
+    def search(self, query: str, after_row=-1, limit=-1) -> Optional[list[int]]:
+        """Returns the indexes of the rows matching the query, or None if the query is empty.
+
+        Only the rows after after_row are returned, at most limit of them (-1 for no limit).
+        """
+        if not query.strip():
+            return None
+
+        if self.search_index.is_available():
+            return self.search_index.search(query, after_row, limit)
+
+        query = query.lower()
+        row_indexes = []
+        start = after_row + 1
+
+        while start < self.get_row_count() and len(row_indexes) != limit:
+            rows = self.get_rows(start, start + self.SEARCH_CHUNK_ROWS)
+
+            for i, text in enumerate(rows, start):
+                if query in text.lower():
+                    row_indexes.append(i)
+
+                    if len(row_indexes) == limit:
+                        break
+
+            start += self.SEARCH_CHUNK_ROWS
+
+        return row_indexes
+
+    def get_mmap(self) -> mmap.mmap:
+        self.flush()
+
+        # the file only grows, so it is mapped again only when new rows have been written
+        if not self.mmap or len(self.mmap) < self.size:
+            if self.mmap:
+                self.mmap.close()
+
+            with open(self.FILENAME, 'rb') as f:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self.mmap
@@ -0,0 +1,51 @@
+import re
+import sqlite3
+import logging
+from typing import Optional
+
+class TextSearchIndex():
+    """Full-text index of the collected strings, based on SQLite FTS5"""
+
+    # single letters match most of the rows, the list is only filtered from the second one
+    MIN_QUERY_LENGTH = 2
+
+    def __init__(self) -> None:
+        self.db: Optional[sqlite3.Connection] = sqlite3.connect(':memory:', isolation_level=None)
+
+        try:
+            # prefix indexes make the queries fast while the user is still typing a word
+            self.db.execute('''CREATE VIRTUAL TABLE rows USING fts5(
+                text, prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+            )''')
+        except sqlite3.OperationalError as e:
+            logging.warn(f'Full-text search is not available: {e}')
+            self.db.close()
+            self.db = None
+
+    def is_available(self) -> bool:
+        return self.db is not None
+
+    def add(self, row_index: int, text: str):
+        if self.db:
+            self.db.execute('INSERT INTO rows(rowid, text) VALUES (?, ?)', (row_index, text))
+
+    def search(self, query: str, after_row=-1, limit=-1) -> Optional[list[int]]:
+        """Returns the indexes of the rows that contain every word of the query, as a prefix.
+
+        Results are paged: only rows after after_row are returned, at most limit of them.
+        FTS5 reads its index in rowid order, so a page costs the same however many rows match.
+        """
+        words = re.findall(r'\w+', query)
+
+        if not self.db or not words or len(''.join(words)) < self.MIN_QUERY_LENGTH:
+            return None
+
+        match = ' '.join([f'"{w}"*' for w in words])
+        cursor = self.db.execute('SELECT rowid FROM rows WHERE rows MATCH ? AND rowid > ? ORDER BY rowid LIMIT ?', 
+            (match, after_row, limit))
+
+        return [r[0] for r in cursor]
+
+    def clear(self):
+        if self.db:
+            self.db.execute('DELETE FROM rows')
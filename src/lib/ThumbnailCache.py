@@ -0,0 +1,34 @@
+import os
+import logging
+from typing import Optional
+
+from .DiskCache import DiskCache
+from .files import get_user_cache_dir
+from .thumbnails import save_png
+
+class ThumbnailCache(DiskCache):
+    """Content-addressed store for preview images, shared by every window and session"""
+
+    CACHE_PATH = get_user_cache_dir() + '/previews'
+    MAX_SIZE_MB = 256
+
+    def get_path(self, key: str, ext='png') -> str:
+        return f'{self.CACHE_PATH}/{key}.{ext}'
+
+    def get(self, key: str, ext='png') -> Optional[str]:
+        path = self.get_path(key, ext)
+
+        if not self.touch(path):
+            return None
+
+        logging.debug(f'Thumbnail cache hit for {key}')
+        return path
+
+    def put(self, key: str, image) -> str:
+        path = self.get_path(key)
+        os.makedirs(self.CACHE_PATH, exist_ok=True)
+
+        save_png(image, path)
+        self.add(path)
+
+        return path
@@ -0,0 +1,62 @@
+import logging
+import threading
+import multiprocessing
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .thumbnails import render_preview, PREVIEW_SIZE
+from .utils import get_gsettings
+
+class ThumbnailPool():
+    """Generates previews in worker processes, so that Pillow can use more than one CPU core"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.workers = 0
+
+    def get_workers(self) -> int:
+        return get_gsettings().get_int('thumbnail-processes')
+
+    def get_executor(self) -> Optional[ProcessPoolExecutor]:
+        workers = self.get_workers()
+
+        with self.lock:
+            if self.executor and workers != self.workers:
+                self.executor.shutdown(wait=False)
+                self.executor = None
+
+            if workers > 0 and not self.executor:
+                logging.debug(f'Starting {workers} thumbnail worker processes')
+
+                # forking a process that is running GTK threads is not safe
+                self.executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+
+            self.workers = workers
+            return self.executor
+
+    def render_preview(self, image_path: str, preview_path: str, system_thumbnail=None) -> str:
+        executor = self.get_executor()
+
+        if executor:
+            try:
+                future = executor.submit(render_preview, image_path, preview_path, 
+                                         PREVIEW_SIZE, system_thumbnail)
+                return future.result()
+            except BrokenProcessPool as e:
+                logging.error(f'Thumbnail worker crashed, falling back to the current process: {e}')
+
+                with self.lock:
+                    self.executor = None
+
+        return render_preview(image_path, preview_path, PREVIEW_SIZE, system_thumbnail)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
@@ -1,3 +1,5 @@
 APP_ID = 'it.mijorus.collector'
 SUPPORTED_IMG_TYPES = ['image/png', 'image/jpg', 'image/jpeg', 'image/webp', 'image/svg+xml', 'image/svg']
 IMAGE_EXT_FORMATS = ["png", "jpeg", "jpg"]
+IMAGE_LINK_EXTENSIONS = ["png", "jpeg", "jpg", "webp", "svg"]
+BINARY_CONTENT_TYPES = ['binary/octet-stream', 'application/octet-stream']
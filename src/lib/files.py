@@ -0,0 +1,103 @@
+import os
+import random
+import string
+import hashlib
+import threading
+import mimetypes
+from datetime import datetime
+
+# read files in chunks when hashing, so big files are never loaded entirely in memory
+HASH_CHUNK_SIZE = 1024 * 1024
+FILE_HASH_CACHE_MAX_ENTRIES = 4096
+
+# bytes read from the beginning of a file to detect its content type
+SNIFF_SIZE = 4096
+
+_file_hash_cache: dict[tuple, str] = {}
+_file_hash_cache_lock = threading.Lock()
+
+def get_user_cache_dir() -> str:
+    # same lookup as GLib.get_user_cache_dir(), flatpak sets XDG_CACHE_HOME to the sandbox cache
+    return os.environ.get('XDG_CACHE_HOME', None) or os.path.expanduser('~/.cache')
+
+def get_file_hash(path: str, alg='md5') -> str:
+    stat = os.stat(path)
+
+    # unchanged files are never read twice
+    cache_key = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size, alg)
+    with _file_hash_cache_lock:
+        if cache_key in _file_hash_cache:
+            return _file_hash_cache[cache_key]
+
+    if alg == 'blake2b':
+        h = hashlib.blake2b(digest_size=16)
+    else:
+        h = hashlib.new(alg)
+
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+
+    filehash = h.hexdigest()
+
+    with _file_hash_cache_lock:
+        if len(_file_hash_cache) >= FILE_HASH_CACHE_MAX_ENTRIES:
+            _file_hash_cache.clear()
+
+        _file_hash_cache[cache_key] = filehash
+
+    return filehash
+
+def sniff_content_type(data: bytes) -> str:
+    """Detects the content type from the first bytes of a file, only images are recognized"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'image/webp'
+
+    if data.startswith(b'GIF87a') or data.startswith(b'GIF89a'):
+        return 'image/gif'
+
+    # the root element can come after a BOM, an XML declaration, comments or a doctype
+    head = data[:SNIFF_SIZE].removeprefix(b'\xef\xbb\xbf').lstrip()
+    if head.startswith(b'<') and b'<svg' in head and not b'<html' in head.lower():
+        return 'image/svg+xml'
+
+    return 'application/octet-stream'
+
+def get_file_content_type(path: str) -> str:
+    if os.path.isdir(path):
+        return 'inode/directory'
+
+    with open(path, 'rb') as f:
+        content_type = sniff_content_type(f.read(SNIFF_SIZE))
+
+    if content_type == 'application/octet-stream':
+        content_type = mimetypes.guess_type(path)[0] or content_type
+
+    return content_type
+
+def get_safe_path(p, ext):
+    """Returns a new file name and creates the empty file, so that the name is never given twice"""
+    now = datetime.now()
+    date_f = now.strftime("%d-%m-%Y_%H-%M-%S")
+
+    pn = f'{p}{date_f}.{ext}'
+
+    i = 1
+    while True:
+        try:
+            # O_EXCL: if a parallel download claims the same name first, the next suffix is used
+            with open(pn, 'xb'):
+                return pn
+        except FileExistsError:
+            i += 1
+            pn = f'{p}{date_f}_{i}.{ext}'
+
+def get_random_string(length):
+    result_str = ''.join(random.choice(string.ascii_letters) for i in range(length))
+    return result_str
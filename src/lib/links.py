@@ -0,0 +1,229 @@
+import os
+import re
+import logging
+import requests
+import threading
+import urllib.parse
+import itertools
+from typing import Callable, Optional
+
+from .constants import SUPPORTED_IMG_TYPES, IMAGE_EXT_FORMATS, IMAGE_LINK_EXTENSIONS
+from .files import sniff_content_type
+from .network import get_http_session
+from .HttpCache import HttpCache
+from .tracing import count
+
+google_re = re.compile(
+    "[http|https]:\/\/www.google.com\/imgres\?imgurl=(.*)\&imgrefurl"
+)
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+http_cache = HttpCache()
+
+def is_link(text: str) -> bool:
+    return text.startswith('http://') or text.startswith('https://')
+
+def resolve_link(link: str, google_images_support=False) -> str:
+    link = link.strip()
+
+    if google_images_support:
+        is_google_image = google_re.findall(link)
+
+        if is_google_image:
+            link = urllib.parse.unquote(is_google_image[0])
+
+    return link
+
+def link_has_image_extension(link: str) -> bool:
+    path = urllib.parse.urlparse(link).path
+    file_ext = os.path.splitext(path)[1].lstrip('.').lower()
+
+    return file_ext in IMAGE_LINK_EXTENSIONS
+
+def split_links(text: str) -> list[str]:
+    """Returns the URLs of a text made of one link per line, or an empty list for any other text"""
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+
+    for l in lines:
+        if not is_link(l) or len(l.split()) > 1:
+            return []
+
+    return lines
+
+def link_is_image(link, google_images_support=False) -> tuple[bool, str]:
+    logging.info(f'Testing link headers for: {link}')
+
+    MAX_SIZE_MB_FOR_BINARIES = 25
+    
+    file_ext = link.strip().split('.')[-1]
+    link = resolve_link(link, google_images_support)
+
+    cache_entry = http_cache.get_entry(link)
+    if cache_entry and http_cache.is_fresh(cache_entry):
+        headers = cache_entry['headers']
+    else:
+        headers = get_http_session().head(link, timeout=30).headers
+
+    is_image = headers.get("content-type", None) in SUPPORTED_IMG_TYPES
+
+    if is_image:
+        logging.info(f'Link appears to be an image')
+    elif headers.get("content-type", None) == 'binary/octet-stream' and \
+            file_ext in IMAGE_EXT_FORMATS:
+
+        logging.debug(f'Link is a binary/octet-stream, but trusting the file extension: {file_ext}')
+
+        item_size = headers.get('content-length', 0)
+        item_size = int(item_size)
+
+        if item_size and item_size < MAX_SIZE_MB_FOR_BINARIES * (1024 * 1024):
+            is_image = True
+
+    return (is_image, link)
+
+class DownloadTooLargeException(Exception):
+    pass
+
+class DownloadCancelledException(Exception):
+    pass
+
+def get_filename_from_headers(link: str, headers) -> str:
+    filename = link.split('/')[-1]
+
+    if headers.get('content-disposition', None):
+        d = headers.get('content-disposition', None)
+        d_filename = re.findall("filename=(.+)", d)
+
+        if d_filename:
+            filename = d_filename[0]
+
+    return filename
+
+def check_response_headers(link: str, headers, max_size: int, 
+                           allowed_content_types: Optional[list[str]] = None) -> bool:
+    header_content_type = headers.get('content-type', '').split(';')[0].strip()
+    if allowed_content_types and header_content_type and \
+            header_content_type not in allowed_content_types:
+        logging.debug(f'Download of {link} stopped, content type header: {header_content_type}')
+        return False
+
+    content_length = int(headers.get('content-length', 0) or 0)
+    if content_length > max_size:
+        raise DownloadTooLargeException(f'{link} is too large: {content_length} bytes')
+
+    return True
+
+def copy_cached_file(link: str, entry: dict, max_size: int,
+                     get_target_path: Callable[[str, str], Optional[str]],
+                     allowed_content_types: Optional[list[str]] = None) -> Optional[tuple[str, str]]:
+    logging.debug(f'Serving {link} from the HTTP cache')
+
+    if not check_response_headers(link, entry['headers'], max_size, allowed_content_types):
+        return None
+
+    if os.path.getsize(entry['body_path']) > max_size:
+        raise DownloadTooLargeException(f'{link} is larger than {max_size} bytes')
+
+    with open(entry['body_path'], 'rb') as f:
+        content_type = sniff_content_type(f.read(DOWNLOAD_CHUNK_SIZE))
+
+    target_path = get_target_path(get_filename_from_headers(link, entry['headers']), content_type)
+    if not target_path:
+        return None
+
+    try:
+        http_cache.copy_body(entry, target_path)
+    except:
+        os.remove(target_path)
+        raise
+
+    return (target_path, content_type)
+
+def download_file(link: str, max_size: int, 
+                  get_target_path: Callable[[str, str], Optional[str]],
+                  allowed_content_types: Optional[list[str]] = None,
+                  cancelled: Optional[threading.Event] = None) -> Optional[tuple[str, str]]:
+    """Streams a file to disk.
+
+    get_target_path receives the file name and the content type sniffed from the first bytes, 
+    creates an empty file where the download should be saved and returns its path, 
+    or returns None to stop the download. The file is removed if the download fails.
+    If allowed_content_types is set, the download stops before reading the body
+    when the Content-Type header is not in the list.
+    The download is stopped as soon as the cancelled event is set.
+    Returns the path and the content type of the downloaded file.
+    """
+    link = link.strip()
+
+    cache_entry = http_cache.get_entry(link)
+    if cache_entry and http_cache.is_fresh(cache_entry):
+        count('http_cache.fresh')
+        return copy_cached_file(link, cache_entry, max_size, get_target_path, allowed_content_types)
+
+    request_headers = http_cache.get_conditional_headers(cache_entry) if cache_entry else {}
+
+    logging.debug(f'Downloading file from url: {link}')
+    try:
+        r = get_http_session().get(link, timeout=30, stream=True, headers=request_headers)
+    except requests.ConnectionError as e:
+        if not cache_entry:
+            raise
+
+        logging.warn(f'Cannot connect to {link}, using a stale cached copy: {e}')
+        count('http_cache.stale')
+        return copy_cached_file(link, cache_entry, max_size, get_target_path, allowed_content_types)
+
+    with r:
+        if r.status_code == 304 and cache_entry:
+            http_cache.refresh(link, cache_entry, r.headers)
+            count('http_cache.revalidated')
+            return copy_cached_file(link, cache_entry, max_size, get_target_path, allowed_content_types)
+
+        if not check_response_headers(link, r.headers, max_size, allowed_content_types):
+            return None
+
+        chunks = r.iter_content(DOWNLOAD_CHUNK_SIZE)
+        first_chunk = next(chunks, b'')
+        content_type = sniff_content_type(first_chunk)
+
+        target_path = get_target_path(get_filename_from_headers(link, r.headers), content_type)
+        if not target_path:
+            logging.debug(f'Download of {link} stopped, content type: {content_type}')
+            return None
+
+        cache_path = None
+        if r.status_code == 200 and http_cache.is_cacheable(r.headers):
+            cache_path = http_cache.get_tmp_body_path(link)
+
+        size = 0
+        try:
+            # the file was claimed by get_target_path, it's written in place and never created again
+            with open(target_path, 'r+b') as f, \
+                    open(cache_path or os.devnull, 'wb') as cache_f:
+
+                for chunk in itertools.chain([first_chunk], chunks):
+                    size += len(chunk)
+
+                    if size > max_size:
+                        raise DownloadTooLargeException(f'{link} is larger than {max_size} bytes')
+
+                    if cancelled and cancelled.is_set():
+                        raise DownloadCancelledException(f'Download of {link} cancelled')
+
+                    f.write(chunk)
+                    cache_f.write(chunk)
+        except:
+            for path in [target_path, cache_path]:
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+            raise
+
+        count('download.files')
+        count('download.bytes', size)
+
+        if cache_path:
+            http_cache.put(link, cache_path, r.headers)
+
+    return (target_path, content_type)
@@ -0,0 +1,31 @@
+import threading
+import requests
+from typing import Optional
+from requests.adapters import HTTPAdapter
+
+# number of hosts that keep a pool of open connections
+POOL_HOSTS = 16
+
+# open connections kept for every host, this is also the max number of parallel requests to the same host
+POOL_CONNECTIONS_PER_HOST = 8
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+def create_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST)
+
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_http_session() -> requests.Session:
+    """Returns the session shared by every window, which reuses connections with keep-alive"""
+    global _http_session
+
+    with _http_session_lock:
+        if not _http_session:
+            _http_session = create_http_session()
+
+        return _http_session
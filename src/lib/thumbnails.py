@@ -0,0 +1,64 @@
+import os
+import logging
+import threading
+from typing import Optional
+from PIL import Image, PngImagePlugin
+
+# this module only depends on Pillow, so that it can be loaded by the thumbnail worker processes
+
+PREVIEW_SIZE = 200
+SYSTEM_THUMBNAIL_SIZE = 128
+
+def load_image_thumbnail(image_path: str, size=PREVIEW_SIZE) -> Image.Image:
+    # thumbnail() already uses draft() for JPEG, the file is closed as soon as the image is loaded
+    with Image.open(image_path) as image:
+        image.thumbnail((size, size))
+
+    return image
+
+def save_png(image: Image.Image, path: str, pnginfo=None):
+    # write to a temporary file first, so that other windows never read a partial image
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    image.save(tmp_path, format='png', pnginfo=pnginfo)
+    os.replace(tmp_path, path)
+
+def save_system_thumbnail_png(image: Image.Image, thumb_path: str, uri: str, mtime: int):
+    thumb = image.copy()
+    thumb.thumbnail((SYSTEM_THUMBNAIL_SIZE, SYSTEM_THUMBNAIL_SIZE))
+
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Thumb::URI', uri)
+    info.add_text('Thumb::MTime', str(mtime))
+    info.add_text('Software', 'Collector')
+
+    os.makedirs(os.path.dirname(thumb_path), mode=0o700, exist_ok=True)
+    save_png(thumb, thumb_path, pnginfo=info)
+    os.chmod(thumb_path, 0o600)
+
+def render_preview(image_path: str, preview_path: str, size=PREVIEW_SIZE,
+                   system_thumbnail: Optional[tuple[str, str, int]] = None) -> str:
+    """Saves the square preview of an image and returns its path.
+    
+    If system_thumbnail is a (path, uri, mtime) tuple, a freedesktop thumbnail is saved as well.
+    """
+    image = load_image_thumbnail(image_path, size)
+
+    if system_thumbnail:
+        try:
+            save_system_thumbnail_png(image, *system_thumbnail)
+        except Exception as e:
+            logging.warn(f'Could not save system thumbnail: {e}')
+
+    image = pillow_crop_center(image, min(image.size))
+
+    os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+    save_png(image, preview_path)
+
+    return preview_path
+
+def pillow_crop_center(pil_img, size):
+    img_width, img_height = pil_img.size
+    return pil_img.crop(((img_width - size) // 2,
+                         (img_height - size) // 2,
+                         (img_width + size) // 2,
+                         (img_height + size) // 2))
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+# spans kept in memory for the export, the oldest ones are dropped first
+MAX_EVENTS = 100000
+
+# upper bounds of the histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+_enabled = False
+_lock = threading.Lock()
+_events: deque[dict] = deque(maxlen=MAX_EVENTS)
+_counters: dict[str, int] = {}
+_histograms: dict[str, dict] = {}
+_thread_names: dict[int, str] = {}
+
+def set_enabled(enabled: bool):
+    """Spans are only recorded when the debug logs are on, otherwise they cost a function call"""
+    global _enabled
+    _enabled = enabled
+
+def is_enabled() -> bool:
+    return _enabled
+
+@contextmanager
+def span(name: str, **args):
+    """Times the code in the with block, e.g. with span('hash', path=path): ..."""
+    if not _enabled:
+        yield
+        return
+
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record_span(name, start, time.perf_counter_ns() - start, args)
+
+def traced(name: str):
+    """Decorator version of span()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def count(name: str, value=1):
+    if not _enabled:
+        return
+
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def record_span(name: str, start_ns: int, duration_ns: int, args: dict):
+    duration_ms = duration_ns / 1_000_000
+    thread = threading.current_thread()
+
+    with _lock:
+        _thread_names[thread.ident] = thread.name
+        _events.append({
+            'name': name,
+            'ts_us': start_ns // 1000,
+            'dur_us': duration_ns // 1000,
+            'tid': thread.ident,
+            'args': {k: str(v) for k, v in args.items()},
+        })
+
+        histogram = _histograms.get(name, None)
+        if not histogram:
+            histogram = {'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+            _histograms[name] = histogram
+
+        histogram['count'] += 1
+        histogram['sum_ms'] += duration_ms
+        histogram['max_ms'] = max(histogram['max_ms'], duration_ms)
+        histogram['buckets'][get_bucket_index(duration_ms)] += 1
+
+    logging.debug(f'[span] {name} took {duration_ms:.2f} ms' + (f' {args}' if args else ''))
+
+def get_bucket_index(duration_ms: float) -> int:
+    for i, upper_bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if duration_ms <= upper_bound:
+            return i
+
+    return len(HISTOGRAM_BUCKETS_MS)
+
+def get_stats() -> dict:
+    """Counters and duration histograms of every span, the buckets are keyed by their upper bound in ms"""
+    labels = [f'<={b}' for b in HISTOGRAM_BUCKETS_MS] + [f'>{HISTOGRAM_BUCKETS_MS[-1]}']
+
+    with _lock:
+        histograms = {}
+        for name, h in _histograms.items():
+            histograms[name] = {
+                'count': h['count'],
+                'sum_ms': round(h['sum_ms'], 3),
+                'avg_ms': round(h['sum_ms'] / h['count'], 3),
+                'max_ms': round(h['max_ms'], 3),
+                'buckets': {l: n for l, n in zip(labels, h['buckets']) if n},
+            }
+
+        return {'counters': dict(_counters), 'histograms': histograms}
+
+def export_json_lines(path: str):
+    """One line for every span, followed by a line with the counters and the histograms"""
+    with _lock:
+        events = list(_events)
+
+    with open(path, 'w') as f:
+        for e in events:
+            f.write(json.dumps({'type': 'span', **e}) + '\n')
+
+        f.write(json.dumps({'type': 'stats', **get_stats()}) + '\n')
+
+def export_chrome_trace(path: str):
+    """Trace event format, can be opened with chrome://tracing or https://ui.perfetto.dev"""
+    pid = os.getpid()
+
+    with _lock:
+        events = list(_events)
+        thread_names = dict(_thread_names)
+        counters = dict(_counters)
+
+    trace_events = [{
+        'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}
+    } for tid, thread_name in thread_names.items()]
+
+    for e in events:
+        trace_events.append({
+            'name': e['name'],
+            'cat': e['name'].split('.')[0],
+            'ph': 'X',
+            'ts': e['ts_us'],
+            'dur': e['dur_us'],
+            'pid': pid,
+            'tid': e['tid'],
+            'args': e['args'],
+        })
+
+    if events and counters:
+        trace_events.append({
+            'name': 'counters', 'ph': 'C', 'ts': events[-1]['ts_us'] + events[-1]['dur_us'],
+            'pid': pid, 'tid': 0, 'args': counters
+        })
+
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+def export(folder: str) -> Optional[tuple[str, str]]:
+    """Writes the recorded spans in both formats, returns the paths of the files"""
+    if not _enabled:
+        return None
+
+    os.makedirs(folder, exist_ok=True)
+    jsonl_path = f'{folder}/trace.jsonl'
+    chrome_path = f'{folder}/trace.json'
+
+    export_json_lines(jsonl_path)
+    export_chrome_trace(chrome_path)
+
+    return (jsonl_path, chrome_path)
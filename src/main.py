@@ -23,22 +23,30 @@ import os
 import shutil
 import argparse
 import logging
-import os
+import time
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Gdk', '4.0')
 gi.require_version('Adw', '1')
+gi.require_version('GdkPixbuf', '2.0')
 
 from .lib.constants import *
 from gi.repository import Gtk, Gio, Adw, Gdk, GLib
 from .window import CollectorWindow
 from .preferences import SettingsWindow
+from .lib.DroppedItem import DroppedItem
 from .lib.utils import get_gsettings, on_click_open_uri
+from .lib import tracing
+from .lib.Profiler import Profiler
+from .lib.MainLoopWatchdog import MainLoopWatchdog
 
 LOG_FILE_MAX_N_LINES = 5000
 LOG_FOLDER = GLib.get_user_cache_dir() + '/logs'
 MAX_WINDOWS_FROM_ARGS = 5
 
+# main loop stalls longer than this are logged when APP_PROFILE includes "stalls"
+DEFAULT_STALL_THRESHOLD_MS = 250
+
 class CollectorApplication(Adw.Application):
     """The main application singleton class."""
 
@@ -67,6 +75,10 @@ class CollectorApplication(Adw.Application):
         css_provider.load_from_resource('/it/mijorus/collector/assets/style.css')
         Gtk.StyleContext.add_provider_for_display(Gdk.Display.get_default(), css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
 
+    def do_shutdown(self):
+        DroppedItem.thumbnail_pool.shutdown()
+        Adw.Application.do_shutdown(self)
+
     def do_activate(self):
         """Called when the application is activated.
 
@@ -165,6 +177,8 @@ def main(version):
             level= logging.DEBUG,
             force=True
         )
+
+        tracing.set_enabled(True)
     else:
         debug_logs = get_gsettings().get_boolean('debug-logs')
         if not os.path.exists(LOG_FOLDER):
@@ -185,5 +199,42 @@ def main(version):
             force=True
         )
 
+        tracing.set_enabled(debug_logs)
+
+    # APP_PROFILE=1 enables everything, otherwise it's a list like "cpu,memory,stalls"
+    profile_modes = os.environ.get('APP_PROFILE', '')
+    profile_modes = ['cpu', 'memory', 'stalls'] if profile_modes == '1' else profile_modes.split(',')
+
+    profiler = Profiler(profile_modes) if set(profile_modes) & set(Profiler.MODES) else None
+    watchdog = None
+
+    if 'stalls' in profile_modes:
+        stall_threshold_ms = int(os.environ.get('APP_PROFILE_STALL_MS', DEFAULT_STALL_THRESHOLD_MS))
+        watchdog = MainLoopWatchdog(stall_threshold_ms)
+        watchdog.start()
+
+    if profiler:
+        profiler.start()
+
     app = CollectorApplication(version)
-    return app.run(sys.argv)
+    status = app.run(sys.argv)
+
+    trace_files = tracing.export(LOG_FOLDER)
+    if trace_files:
+        print(f'Timing spans saved to {", ".join(trace_files)}')
+
+    profile_files = []
+    if profiler:
+        profiler.stop()
+        profile_files += profiler.dump(LOG_FOLDER)
+
+    if watchdog:
+        watchdog.stop()
+        stalls_file = watchdog.dump(LOG_FOLDER, time.strftime('%Y%m%d-%H%M%S'))
+        if stalls_file:
+            profile_files.append(stalls_file)
+
+    if profile_files:
+        print(f'Profiling reports saved to {", ".join(profile_files)}')
+
+    return status
@@ -18,11 +18,15 @@ class SettingsWindow(Adw.PreferencesWindow):
     download_images_row = Gtk.Template.Child()
     download_images = Gtk.Template.Child()
     text_as_csv = Gtk.Template.Child()
+    monitor_dropped_files = Gtk.Template.Child()
     open_gnome_ext = Gtk.Template.Child()
     configure_kde = Gtk.Template.Child()
     launch_shortcut = Gtk.Template.Child()
     launch_shortcut_windows = Gtk.Template.Child()
     google_images_support = Gtk.Template.Child()
+    write_system_thumbnails = Gtk.Template.Child()
+    thumbnail_processes = Gtk.Template.Child()
+    max_download_size = Gtk.Template.Child()
     debug_logs = Gtk.Template.Child()
 
     def __init__(self):
@@ -35,10 +39,18 @@ class SettingsWindow(Adw.PreferencesWindow):
         
         self.settings.bind('google-images-support', self.google_images_support, 
         'active', Gio.SettingsBindFlags.DEFAULT)
+        self.settings.bind('write-system-thumbnails', self.write_system_thumbnails, 
+        'active', Gio.SettingsBindFlags.DEFAULT)
         self.settings.bind('download-images', self.download_images, 
         'active', Gio.SettingsBindFlags.DEFAULT)
         self.settings.bind('collect-text-to-csv', self.text_as_csv, 
         'active', Gio.SettingsBindFlags.DEFAULT)
+        self.settings.bind('max-download-size-mb', self.max_download_size, 
+        'value', Gio.SettingsBindFlags.DEFAULT)
+        self.settings.bind('thumbnail-processes', self.thumbnail_processes, 
+        'value', Gio.SettingsBindFlags.DEFAULT)
+        self.settings.bind('monitor-dropped-files', self.monitor_dropped_files, 
+        'active', Gio.SettingsBindFlags.DEFAULT)
         self.settings.bind('debug-logs', self.debug_logs, 
         'active', Gio.SettingsBindFlags.DEFAULT)
 
@@ -21,7 +21,6 @@ import os
 import gi
 import shutil
 import logging
-import threading
 from typing import Optional
 
 from gi.repository import Gtk, Adw, Gio, Gdk, GObject, GLib
@@ -29,7 +28,12 @@ from gi.repository import Gtk, Adw, Gio, Gdk, GObject, GLib
 from .lib.constants import APP_ID, SUPPORTED_IMG_TYPES
 from .lib.CarouselItem import CarouselItem
 from .lib.CsvCollector import CsvCollector
-from .lib.utils import get_gsettings
+from .lib.CsvContentProvider import CsvContentProvider
+from .lib.IngestionPipeline import IngestionPipeline
+from .lib.FileWatcher import FileWatcher
+from .lib.DirectorySizeWalker import DirectorySizeWalker
+from .lib.utils import get_gsettings, split_links
+from .lib.tracing import span, traced, count
 from .lib.DroppedItem import DroppedItem, DroppedItemNotSupportedException
 
 class CollectorWindow(Adw.ApplicationWindow):
@@ -52,6 +56,9 @@ class CollectorWindow(Adw.ApplicationWindow):
         self.clipboard = Gdk.Display.get_default().get_clipboard()
         self.window_color_btn: Optional[Gtk.Button] = None
         self.csvcollector: Optional[CsvCollector] = None
+        self.ingestion_pipeline = IngestionPipeline(self.on_drop_event_complete)
+        self.file_watcher = FileWatcher(self.on_watched_files_changed, self.on_watched_files_deleted)
+        self.size_walkers: dict[CarouselItem, DirectorySizeWalker] = {}
 
         header_bar = self.create_header_bar()
         bottom_bar = self.create_bottom_bar()
@@ -135,6 +142,7 @@ class CollectorWindow(Adw.ApplicationWindow):
         content_box.add_controller(self.drag_source_controller)
 
         self.dropped_items: list[CarouselItem] = []
+        self.tot_size = 0
         self.set_default_size(300, 300)
         self.set_resizable(False)
         self.set_content(toolbar)
@@ -165,6 +173,9 @@ class CollectorWindow(Adw.ApplicationWindow):
         if not self.dropped_items:
             return None
 
+        if self.csvcollector:
+            self.csvcollector.flush()
+
         uri_list = '\n'.join([f'file://{f.dropped_item.target_path}' for f in self.dropped_items])
         return Gdk.ContentProvider.new_union([
             Gdk.ContentProvider.new_for_bytes(
@@ -202,20 +213,24 @@ class CollectorWindow(Adw.ApplicationWindow):
 
         return True
     
+    @traced('window.on_drop_event_complete')
     def on_drop_event_complete(self, carousel_items: list[CarouselItem]):
-        new_image = False
+        count('on_drop_event_complete.items', len(carousel_items))
+        scroll_to_image = None
         for carousel_item in carousel_items:
+            if not carousel_item in self.dropped_items:
+                # the placeholder was deleted while the item was loading
+                continue
+
             dropped_item = carousel_item.dropped_item
-            self.icon_carousel.remove(carousel_item.image)
-            
-            for i, c in enumerate(self.dropped_items):
-                if c is carousel_item:
-                    del self.dropped_items[i]
-                    break
 
             if self.settings.get_boolean('collect-text-to-csv') and \
                     dropped_item.content_is_text:
 
+                self.icon_carousel.remove(carousel_item.image)
+                self.dropped_items.remove(carousel_item)
+                self.untrack_item_size(carousel_item)
+
                 value = dropped_item.get_text_content()
                 if self.csvcollector:
                     self.csvcollector.append_text(value)
@@ -240,36 +255,29 @@ class CollectorWindow(Adw.ApplicationWindow):
                 new_image = self.get_new_image_from_dropped_item(dropped_item)
                 new_image.set_tooltip_text(dropped_item.display_value)
 
-                carousel_item.image = new_image
-
-                self.icon_carousel.append(new_image)          
-                self.dropped_items.append(carousel_item)  
-                self.dropped_items[carousel_item.index] = carousel_item
+                # replace the placeholder in place, so that the order of the drop is preserved
+                position = self.dropped_items.index(carousel_item)
+                self.icon_carousel.insert(new_image, position)
+                self.icon_carousel.remove(carousel_item.image)
 
-        if new_image:
-            self.icon_carousel.scroll_to(new_image, True)
+                if isinstance(carousel_item.image, Gtk.Spinner):
+                    scroll_to_image = new_image
 
-        self.update_tot_size_sum()
-
-    def on_drop_event_complete_async(self, carousel_items: list[CarouselItem]):
-        async_items: list[CarouselItem] = []
-        GLib.idle_add(lambda: self.update_tot_size_sum(True))
-
-        for carousel_item in carousel_items:
-            if carousel_item.dropped_item.async_load:
-                async_items.append(carousel_item)
-
-        async_opts: list[threading.Thread] = []
+                carousel_item.image = new_image
+                carousel_item.index = position
+                self.track_item_size(carousel_item)
+                self.watch_item(carousel_item)
 
-        for item in async_items:
-            t = threading.Thread(target=item.dropped_item.complete_load)
-            async_opts.append(t)
+                if dropped_item.is_directory:
+                    self.compute_directory_size(carousel_item)
 
-        [t.start() for t in async_opts]
-        [t.join() for t in async_opts]
+        if scroll_to_image:
+            self.icon_carousel.scroll_to(scroll_to_image, True)
 
-        logging.debug('Loading async items terminated')
-        GLib.idle_add(lambda: self.on_drop_event_complete(async_items))
+        if self.dropped_items:
+            self.update_tot_size_sum()
+        else:
+            self.reset_to_empty_state()
 
     def on_drop_enter(self, widget, x, y):
         if not self.is_dragging_away:
@@ -372,15 +380,22 @@ class CollectorWindow(Adw.ApplicationWindow):
         i = i - 1 if direction == 0 else i + 1
         self.icon_carousel.scroll_to(self.dropped_items[i].image, True)
 
+    @traced('window.drop_value')
     def drop_value(self, value):
         dropped_items = []
         carousel_items = []
+        links = split_links(value) if isinstance(value, str) else []
     
         try:
             if isinstance(value, Gdk.FileList):
                 for file in value.get_files():
                     d = DroppedItem(file, drops_dir=self.DROPS_PATH)
                     dropped_items.append(d)
+            elif len(links) > 1 and self.settings.get_boolean('download-images'):
+                # every link is downloaded on its own, so that they are fetched concurrently
+                for link in links:
+                    d = DroppedItem(link, drops_dir=self.DROPS_PATH)
+                    dropped_items.append(d)
             elif isinstance(value, str) and self.settings.get_boolean('collect-text-to-csv'):
                 dropped_item = DroppedItem(value, drops_dir=self.DROPS_PATH)
 
@@ -420,32 +435,33 @@ class CollectorWindow(Adw.ApplicationWindow):
             return False
 
         new_image = None
-        for dropped_item in dropped_items:
-            if dropped_item.async_load:
-                loader = Gtk.Spinner(spinning=True, hexpand=False, vexpand=False)
-                carousel_item = CarouselItem(
-                    item=dropped_item, 
-                    image=loader,
-                    index=len(self.dropped_items)
-                )
+        with span('drop_value.add_widgets', items=len(dropped_items)):
+            for dropped_item in dropped_items:
+                if dropped_item.async_load:
+                    loader = Gtk.Spinner(spinning=True, hexpand=False, vexpand=False)
+                    carousel_item = CarouselItem(
+                        item=dropped_item, 
+                        image=loader,
+                        index=len(self.dropped_items)
+                    )
 
-                carousel_items.append(carousel_item)
-                self.icon_carousel.append(loader)
-            else:
-                new_image = self.get_new_image_from_dropped_item(dropped_item)
-                new_image.set_tooltip_text(dropped_item.display_value)
+                    carousel_items.append(carousel_item)
+                    self.icon_carousel.append(loader)
+                else:
+                    new_image = self.get_new_image_from_dropped_item(dropped_item)
+                    new_image.set_tooltip_text(dropped_item.display_value)
                 
-                carousel_item = CarouselItem(
-                    item=dropped_item, 
-                    image=new_image,
-                    index=0 if dropped_item.is_clipboard else len(self.dropped_items)
-                )
+                    carousel_item = CarouselItem(
+                        item=dropped_item, 
+                        image=new_image,
+                        index=0 if dropped_item.is_clipboard else len(self.dropped_items)
+                    )
 
-                carousel_items.append(carousel_item)
-                if dropped_item.is_clipboard:
-                    self.icon_carousel.prepend(new_image)
-                else:
-                    self.icon_carousel.append(new_image)
+                    carousel_items.append(carousel_item)
+                    if dropped_item.is_clipboard:
+                        self.icon_carousel.prepend(new_image)
+                    else:
+                        self.icon_carousel.append(new_image)
 
         for c in carousel_items:
             if c.dropped_item.is_clipboard:
@@ -453,11 +469,14 @@ class CollectorWindow(Adw.ApplicationWindow):
             else:
                 self.dropped_items.append(c)
 
-        if any([d.async_load for d in dropped_items]):
-            threading.Thread(
-                target=self.on_drop_event_complete_async, 
-                args=(carousel_items,)
-            ).start()
+            self.track_item_size(c)
+
+        async_items = [c for c in carousel_items if c.dropped_item.async_load]
+        count('drop_value.items', len(carousel_items))
+
+        if async_items:
+            with span('drop_value.submit', items=len(async_items)):
+                self.ingestion_pipeline.submit(async_items)
 
         self.icon_stack.set_visible_child(self.carousel_container)
 
@@ -487,6 +506,10 @@ class CollectorWindow(Adw.ApplicationWindow):
 
             self.icon_carousel.remove(item.image)
             self.dropped_items.pop(i)
+            item.dropped_item.cancel()
+            self.untrack_item_size(item)
+            self.file_watcher.unwatch(item)
+            self.cancel_directory_size(item)
             self.on_drop_leave(None)
 
             self.update_tot_size_sum()
@@ -511,8 +534,7 @@ class CollectorWindow(Adw.ApplicationWindow):
         carousel_item = self.dropped_items[i]
 
         if carousel_item.dropped_item.is_clipboard:
-            content = self.csvcollector.get_copied_text()
-            content_prov = Gdk.ContentProvider.new_for_value('\n'.join(content))
+            content_prov = CsvContentProvider(self.csvcollector)
         elif carousel_item.dropped_item.content_is_text:
             content = carousel_item.dropped_item.get_text_content()
             content_prov = Gdk.ContentProvider.new_for_value(content)
@@ -534,7 +556,9 @@ class CollectorWindow(Adw.ApplicationWindow):
             self.drops_label.set_label('...')
             return
 
-        tot_size = sum([d.dropped_item.get_size() for d in self.dropped_items])
+        tot_size = self.tot_size
+        if self.csvcollector:
+            tot_size += self.csvcollector.size
 
         if tot_size > (1024 * 1024 * 1024):
             tot_size = f'{round(tot_size / (1024 * 1024 * 1024), 1)} GB'
@@ -553,8 +577,68 @@ class CollectorWindow(Adw.ApplicationWindow):
                 size=tot_size
             ))
 
+    def track_item_size(self, carousel_item: CarouselItem):
+        # the size of the collected text is read from the CsvCollector
+        size = 0 if carousel_item.dropped_item.is_clipboard else carousel_item.dropped_item.size
+
+        self.tot_size += size - carousel_item.counted_size
+        carousel_item.counted_size = size
+
+    def untrack_item_size(self, carousel_item: CarouselItem):
+        self.tot_size -= carousel_item.counted_size
+        carousel_item.counted_size = 0
+
+    def watch_item(self, carousel_item: CarouselItem):
+        dropped_item = carousel_item.dropped_item
+
+        # only files that were dropped by the user can be changed by someone else
+        if self.settings.get_boolean('monitor-dropped-files') and \
+                isinstance(dropped_item.received_item, Gio.File) and not dropped_item.is_clipboard:
+            self.file_watcher.watch(carousel_item)
+
+    def on_watched_files_changed(self, carousel_items: list[CarouselItem]):
+        carousel_items = [c for c in carousel_items if c in self.dropped_items]
+        self.ingestion_pipeline.submit(carousel_items, reload=True)
+
+    def on_watched_files_deleted(self, carousel_items: list[CarouselItem]):
+        for c in carousel_items:
+            logging.debug(f'Dropped file has been removed: {c.dropped_item.target_path}')
+            c.dropped_item.set_missing()
+
+        self.on_drop_event_complete(carousel_items)
+
+    def compute_directory_size(self, carousel_item: CarouselItem):
+        self.cancel_directory_size(carousel_item)
+
+        def on_progress(size, done):
+            carousel_item.dropped_item.size = size
+            self.track_item_size(carousel_item)
+            self.update_tot_size_sum()
+
+            if done:
+                self.size_walkers.pop(carousel_item, None)
+
+        walker = DirectorySizeWalker(carousel_item.dropped_item.gfile, on_progress)
+        self.size_walkers[carousel_item] = walker
+        walker.start()
+
+    def cancel_directory_size(self, carousel_item: CarouselItem):
+        walker = self.size_walkers.pop(carousel_item, None)
+        if walker:
+            walker.cancel()
+
+    def cancel_all_directory_sizes(self):
+        for walker in self.size_walkers.values():
+            walker.cancel()
+
+        self.size_walkers = {}
+
     def remove_all_items(self):
+        self.file_watcher.unwatch_all()
+        self.cancel_all_directory_sizes()
+
         for d in self.dropped_items:
+            d.dropped_item.cancel()
             self.icon_carousel.remove(d.image)
 
         if self.csvcollector:
@@ -562,6 +646,7 @@ class CollectorWindow(Adw.ApplicationWindow):
             self.csvcollector = None
 
         self.dropped_items = []
+        self.tot_size = 0
         self.update_tot_size_sum()
         self.reset_to_empty_state()
 
@@ -570,6 +655,16 @@ class CollectorWindow(Adw.ApplicationWindow):
         self.icon_stack.set_visible_child(self.default_drop_icon)
 
     def on_close_request(self, widget):
+        for d in self.dropped_items:
+            d.dropped_item.cancel()
+
+        self.ingestion_pipeline.shutdown()
+        self.file_watcher.unwatch_all()
+        self.cancel_all_directory_sizes()
+
+        if self.csvcollector:
+            self.csvcollector.close()
+
         if os.path.exists(self.DROPS_PATH):
             logging.debug('Removing ' +  self.DROPS_PATH)
             shutil.rmtree(self.DROPS_PATH)